@@ -30,8 +30,16 @@ COMMENT = 'Master patient dimension table';
 -- TABLE 2: IMPORTS (Metadata and Lineage)
 -- ================================================================
 
+-- Import ids are allocated by the client from this sequence (in prefetched
+-- blocks) so an import knows its id before inserting. Starts high to stay
+-- clear of ids issued by the original AUTOINCREMENT column.
+CREATE SEQUENCE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.IMPORT_ID_SEQ
+    START = 1000000
+    INCREMENT = 1
+    COMMENT = 'Allocates IMPORTS.import_id values';
+
 CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.IMPORTS (
-    import_id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    import_id INTEGER NOT NULL PRIMARY KEY DEFAULT HEALTH_INTELLIGENCE.HEALTH_RECORDS.IMPORT_ID_SEQ.NEXTVAL,
     patient_id INTEGER NOT NULL,
     import_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
     source_files VARCHAR(4000),  -- JSON array as VARCHAR: ["file1.json", "file2.json"]
@@ -58,6 +66,7 @@ CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS (
     record_date DATE NOT NULL,
     provider_identity VARCHAR(500),  -- Use IDENTITY not NAME (Cortex Analyst)
     data_json VARCHAR(16000) NOT NULL,  -- Full JSON payload (not VARIANT per design)
+    data_variant VARIANT,  -- Parsed copy of data_json for path predicates
     extraction_confidence DECIMAL(5, 2),  -- 0-100 confidence score
     verification_status VARCHAR(50) DEFAULT 'UNVERIFIED',  -- UNVERIFIED, VERIFIED, FLAGGED
     created_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
@@ -69,6 +78,109 @@ CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS (
 )
 COMMENT = 'Unified fact table for all health records (labs, vitals, medications, conditions, allergies, immunizations)';
 
+-- Migration for tables created before data_variant existed: add the
+-- column and parse the rows that predate it (no-op once backfilled)
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+ADD COLUMN IF NOT EXISTS data_variant VARIANT;
+
+UPDATE HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+SET data_variant = TRY_PARSE_JSON(data_json)
+WHERE data_variant IS NULL;
+
+-- ================================================================
+-- TABLES 4-5: TYPED PROJECTIONS (Written at import time)
+-- ================================================================
+
+-- One row per LAB / VITAL record with its values parsed out of data_json,
+-- so aggregates scan native numbers. The client fills these in the same
+-- transaction as the HEALTH_RECORDS rows; rows imported before these
+-- tables existed are projected by deploy_schema.py after this DDL runs
+-- (SnowflakeClient.backfill_typed_projections()).
+
+CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.LAB_RESULTS (
+    record_id INTEGER NOT NULL PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    import_id INTEGER,
+    record_date DATE NOT NULL,
+    test_identity VARCHAR(500),  -- test_name as extracted
+    test_key VARCHAR(500),  -- Lowercased, trimmed test_name for matching
+    result_numeric FLOAT,  -- Leading number of result_value ("105 mg/dL" -> 105)
+    result_units VARCHAR(100),  -- Use UNITS not UNIT (Cortex Analyst)
+    abnormal_flag VARCHAR(50),  -- HIGH, LOW, ... (NULL when normal)
+    created_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    CONSTRAINT fk_lab_record FOREIGN KEY (record_id)
+        REFERENCES HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS(record_id)
+)
+COMMENT = 'Typed projection of LAB health records';
+
+CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.VITAL_READINGS (
+    record_id INTEGER NOT NULL PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    import_id INTEGER,
+    record_date DATE NOT NULL,
+    vital_class VARCHAR(100),  -- vital_type as extracted (Use CLASS not TYPE)
+    vital_key VARCHAR(100),  -- Normalized: bp, hr, temp, rr, o2sat, weight, height, bmi
+    value_numeric FLOAT,  -- Leading number of value (systolic for BP)
+    value_secondary FLOAT,  -- Number after '/' (diastolic for BP)
+    value_units VARCHAR(100),
+    created_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    CONSTRAINT fk_vital_record FOREIGN KEY (record_id)
+        REFERENCES HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS(record_id)
+)
+COMMENT = 'Typed projection of VITAL health records';
+
+-- Lab results and vital readings as one measurement stream
+CREATE OR REPLACE VIEW HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENTS AS
+SELECT
+    'LAB' AS measure_class, record_id, patient_id, import_id, record_date,
+    COALESCE(test_key, '') AS measure_key, result_numeric AS value_numeric
+FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.LAB_RESULTS
+UNION ALL
+SELECT
+    'VITAL' AS measure_class, record_id, patient_id, import_id, record_date,
+    COALESCE(vital_key, '') AS measure_key, value_numeric
+FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.VITAL_READINGS;
+
+-- ================================================================
+-- TABLES 6-7: MEASUREMENT ROLLUPS (Maintained at import time)
+-- ================================================================
+
+-- Per patient, measure and day / month bucket (month buckets are keyed by
+-- the first day of the month). Each import MERGEs its own rows into the
+-- buckets it touches. deploy_schema.py recomputes them from MEASUREMENTS
+-- (SnowflakeClient.rebuild_rollups()) after backfilling the projections,
+-- so rows imported before the rollups existed are counted too.
+
+CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_DAILY (
+    patient_id INTEGER NOT NULL,
+    measure_class VARCHAR(50) NOT NULL,  -- LAB or VITAL
+    measure_key VARCHAR(500) NOT NULL,  -- LAB_RESULTS.test_key / VITAL_READINGS.vital_key
+    bucket_date DATE NOT NULL,
+    record_count INTEGER NOT NULL,  -- All records in the bucket
+    value_count INTEGER NOT NULL,  -- Records with a numeric value
+    value_sum FLOAT,
+    value_min FLOAT,
+    value_max FLOAT,
+    updated_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    CONSTRAINT pk_measurement_daily PRIMARY KEY (patient_id, measure_class, measure_key, bucket_date)
+)
+COMMENT = 'Daily count/sum/min/max of lab and vital values';
+
+CREATE TABLE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_MONTHLY (
+    patient_id INTEGER NOT NULL,
+    measure_class VARCHAR(50) NOT NULL,
+    measure_key VARCHAR(500) NOT NULL,
+    bucket_date DATE NOT NULL,  -- First day of the month
+    record_count INTEGER NOT NULL,
+    value_count INTEGER NOT NULL,
+    value_sum FLOAT,
+    value_min FLOAT,
+    value_max FLOAT,
+    updated_date TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP(),
+    CONSTRAINT pk_measurement_monthly PRIMARY KEY (patient_id, measure_class, measure_key, bucket_date)
+)
+COMMENT = 'Monthly count/sum/min/max of lab and vital values';
+
 -- ================================================================
 -- CLUSTERING KEYS FOR PERFORMANCE
 -- ================================================================
@@ -79,13 +191,38 @@ CLUSTER BY (patient_id, record_class, record_date);
 ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.IMPORTS
 CLUSTER BY (patient_id, import_date);
 
+-- Search optimization on the data_variant paths queries filter by, so
+-- equality and ILIKE predicates prune micro-partitions
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+ADD SEARCH OPTIMIZATION ON
+    EQUALITY(data_variant:test_name),
+    SUBSTRING(data_variant:test_name),
+    EQUALITY(data_variant:vital_type),
+    SUBSTRING(data_variant:vital_type),
+    EQUALITY(data_variant:status),
+    EQUALITY(data_variant:abnormal_flag);
+
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.LAB_RESULTS
+CLUSTER BY (patient_id, test_key, record_date);
+
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.VITAL_READINGS
+CLUSTER BY (patient_id, vital_key, record_date);
+
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_DAILY
+CLUSTER BY (patient_id, measure_key, bucket_date);
+
+ALTER TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_MONTHLY
+CLUSTER BY (patient_id, measure_key, bucket_date);
+
 -- ================================================================
--- STAGE FOR SEMANTIC MODEL
+-- STAGE FOR SEMANTIC MODEL AND BULK IMPORTS
 -- ================================================================
 
+-- Bulk imports PUT gzip NDJSON files under imports/<import_id>/ and
+-- COPY them into HEALTH_RECORDS (files are purged after loading)
 CREATE STAGE IF NOT EXISTS HEALTH_INTELLIGENCE.HEALTH_RECORDS.RAW_DATA
     FILE_FORMAT = (TYPE = 'JSON')
-    COMMENT = 'Raw data staging for semantic model upload';
+    COMMENT = 'Raw data staging for semantic model upload and bulk record imports';
 
 -- ================================================================
 -- PERMISSIONS FOR CORTEX ANALYST
@@ -107,6 +244,10 @@ SHOW TABLES IN SCHEMA HEALTH_INTELLIGENCE.HEALTH_RECORDS;
 DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.PATIENTS;
 DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.IMPORTS;
 DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS;
+DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.LAB_RESULTS;
+DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.VITAL_READINGS;
+DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_DAILY;
+DESCRIBE TABLE HEALTH_INTELLIGENCE.HEALTH_RECORDS.MEASUREMENT_MONTHLY;
 
 -- Verify constraints
 SELECT * FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark NLMapper.parse_intent as the vocabulary grows
+
+Pads the semantic catalog's vocabularies with synthetic terms and reports parsed
+queries/sec for the compiled phrase matcher next to the original nested
+substring scans, plus repeat questions answered from the intent memo. Runs
+offline (no Snowflake connection needed).
+
+Usage:
+    python bench_nl_mapper.py [--sizes 0,100,1000,5000] [--seconds 1.0]
+"""
+
+import argparse
+import dataclasses
+import sys
+import time
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from nl_mapper import NLMapper
+from semantic_catalog import SemanticCatalog, load_catalog
+
+
+QUERIES = [
+    "What was my average blood glucose last year?",
+    "How many active medications do I have?",
+    "Show me my blood pressure readings from the last 30 days",
+    "List all abnormal lab results",
+    "What is my latest cholesterol level?",
+    "Tell me about recent doctor visits",
+    "Do I have any drug allergies?",
+    "What was my highest heart rate in the last 3 months, oldest first?",
+]
+
+
+def padded_catalog(base: SemanticCatalog, extra_terms: int) -> SemanticCatalog:
+    """Copy of base with extra_terms synthetic synonyms and test names"""
+    synonyms = dict(base.record_type_synonyms)
+    tests = dict(base.test_patterns)
+    for i in range(extra_terms):
+        if i % 2:
+            synonyms[f"synthetic record {i}"] = "NOTE"
+        else:
+            tests[f"synthetic{i}"] = [f"synthetic test {i}", f"synthetic panel {i} result"]
+    
+    return dataclasses.replace(base, record_type_synonyms=synonyms, test_patterns=tests, matcher=None)
+
+
+def legacy_parse(catalog: SemanticCatalog, query: str):
+    """The pre-matcher parse_intent slot extraction (nested substring scans)"""
+    query_lower = query.lower().strip()
+    
+    record_type = metric = time_period = attribute = None
+    for synonym, value in catalog.record_type_synonyms.items():
+        if synonym in query_lower:
+            record_type = value
+            break
+    for name, patterns in catalog.metric_patterns.items():
+        if any(pattern in query_lower for pattern in patterns):
+            metric = name
+            break
+    for time_phrase in catalog.time_periods:
+        if time_phrase in query_lower:
+            time_period = time_phrase
+            break
+    for test_key, test_names in catalog.test_patterns.items():
+        if any(test_name.lower() in query_lower for test_name in test_names):
+            attribute = test_key
+            break
+    
+    return record_type, metric, time_period, attribute
+
+
+def queries_per_second(parse, seconds: float) -> float:
+    """Run parse over QUERIES repeatedly for about `seconds`"""
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for query in QUERIES:
+            parse(query)
+        count += len(QUERIES)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="0,100,1000,5000", help="Synthetic terms to add")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time per measurement")
+    args = parser.parse_args()
+    
+    base = load_catalog(cache_path="")
+    
+    print(
+        f"{'extra terms':>12} {'phrases':>8} {'compile ms':>11} {'matcher q/s':>12} "
+        f"{'legacy q/s':>11} {'speedup':>8} {'memo q/s':>12} {'memo ns':>8}"
+    )
+    for size in [int(value) for value in args.sizes.split(",")]:
+        started = time.perf_counter()
+        catalog = padded_catalog(base, size)  # compiles its matcher
+        compile_ms = 1000 * (time.perf_counter() - started)
+        phrases = len(catalog.matcher)
+        
+        mapper = NLMapper(catalog, intent_cache_size=0)
+        compiled = queries_per_second(mapper.parse_intent, args.seconds)
+        legacy = queries_per_second(lambda query: legacy_parse(catalog, query), args.seconds)
+        memo = queries_per_second(NLMapper(catalog).parse_intent, args.seconds)
+        
+        print(
+            f"{size:>12} {phrases:>8} {compile_ms:>11.1f} {compiled:>12,.0f} "
+            f"{legacy:>11,.0f} {compiled / legacy:>7.1f}x {memo:>12,.0f} {1e9 / memo:>8.0f}"
+        )
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
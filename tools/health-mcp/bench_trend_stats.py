@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark the trend_stats module on wearable-sized series
+
+Generates a minute-resolution heart rate series (1M points is about two
+years of a wearable) and times each statistic. Runs offline (no Snowflake
+connection needed).
+
+Usage:
+    python bench_trend_stats.py [--points 1000000] [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import trend_stats
+
+
+def synthetic_series(points: int, seed: int = 0):
+    """Minute-level heart rate: daily cycle, slow drift, noise and a few spikes"""
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(points)
+    dates = np.datetime64("2024-01-01", "D") + (minutes // 1440)
+    values = (
+        70.0
+        + 8.0 * np.sin(2 * np.pi * minutes / 1440)
+        + 0.00001 * minutes
+        + rng.normal(0.0, 3.0, points)
+    )
+    spikes = rng.choice(points, size=max(1, points // 10000), replace=False)
+    values[spikes] += 60.0
+    return dates, values
+
+
+def best_of(repeat: int, function, *args) -> float:
+    """Fastest of `repeat` runs, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return 1000 * min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000, help="Series length")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per statistic (best is reported)")
+    args = parser.parse_args()
+    
+    dates, values = synthetic_series(args.points)
+    
+    benchmarks = [
+        ("summarize", trend_stats.summarize, values, dates),
+        ("slope_per_day", trend_stats.slope_per_day, dates, values),
+        ("rolling_mean(60)", trend_stats.rolling_mean, values, 60),
+        ("ewma(0.05)", trend_stats.ewma, values, 0.05),
+        ("percentiles", trend_stats.percentiles, values),
+        ("outlier_mask", trend_stats.outlier_mask, values),
+        ("lttb(1000)", trend_stats.lttb, dates, values, 1000),
+    ]
+    
+    print(f"{args.points:,} points, best of {args.repeat}")
+    print(f"{'statistic':>18} {'ms':>9}")
+    total = 0.0
+    for label, function, *function_args in benchmarks:
+        elapsed = best_of(args.repeat, function, *function_args)
+        total += elapsed
+        print(f"{label:>18} {elapsed:>9.1f}")
+    print(f"{'total':>18} {total:>9.1f}")
+    
+    summary = trend_stats.summarize(values, dates)
+    print(f"\nslope/day {summary['slope_per_day']:.4f}, trend {summary['trend']}, {summary['outliers']:,} outliers")
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,11 @@ import sys
 from pathlib import Path
 from snowflake.connector import connect
 
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from snowflake_client import SnowflakeClient
+
 # Snowflake connection details
 SNOWFLAKE_CONFIG = {
     "account": "kgqnwwa-zxb81952",
@@ -108,6 +113,10 @@ def deploy_schema():
                 table_name = table[1]  # Name is in second column
                 print(f"   - {table_name}")
             
+            print()
+            if not backfill_derived_tables():
+                return False
+            
             print()
             print("=" * 70)
             print("✓ SCHEMA DEPLOYMENT SUCCESSFUL")
@@ -130,6 +139,46 @@ def deploy_schema():
         except:
             pass
 
+def backfill_derived_tables() -> bool:
+    """
+    Fill the tables derived from HEALTH_RECORDS for rows imported before they existed
+    
+    Imports keep LAB_RESULTS / VITAL_READINGS and the measurement rollups
+    current, but rows already in HEALTH_RECORDS when those tables were
+    created have to be projected once, and the rollups recomputed from the
+    projections. Safe to re-run: rows that already have a projection are
+    skipped and the rollups are rebuilt from scratch.
+    """
+    print("Backfilling derived tables:")
+    print("-" * 70)
+    
+    client = SnowflakeClient(
+        account_id=SNOWFLAKE_CONFIG["account"],
+        username=SNOWFLAKE_CONFIG["user"],
+        password=SNOWFLAKE_CONFIG["password"],
+        warehouse=SNOWFLAKE_CONFIG["warehouse"],
+    )
+    if not client.connect():
+        print("❌ Backfill failed: could not connect")
+        return False
+    
+    try:
+        added = client.backfill_typed_projections()
+        for table, rows in added.items():
+            print(f"✓ {table}: {rows} rows projected")
+        
+        client.rebuild_rollups()
+        print(f"✓ Rebuilt {', '.join(SnowflakeClient.ROLLUP_BUCKETS)}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+        
+    finally:
+        client.disconnect()
+
+
 if __name__ == "__main__":
     success = deploy_schema()
     sys.exit(0 if success else 1)
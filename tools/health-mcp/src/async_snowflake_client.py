@@ -0,0 +1,85 @@
+"""
+Async Snowflake Client
+Asyncio-facing wrapper that keeps blocking Snowflake I/O off the event loop
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from health_models import HealthRecord
+from snowflake_client import SnowflakeClient
+
+
+class AsyncSnowflakeClient:
+    """
+    Runs SnowflakeClient calls in a bounded thread pool
+    
+    The Snowflake connector is synchronous, so awaiting these methods hands
+    the blocking call to a worker thread and frees the event loop for other
+    tool calls. Size max_workers to the connection pool so that workers do
+    not queue on pool checkouts.
+    """
+    
+    def __init__(self, client: SnowflakeClient, max_workers: int = 4):
+        """
+        Initialize async client
+        
+        Args:
+            client: Connected (ideally pooled) Snowflake client
+            max_workers: Maximum concurrent blocking Snowflake calls
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="snowflake-io",
+        )
+    
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run any blocking callable on the Snowflake worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict]:
+        """Async SnowflakeClient.execute_query"""
+        return await self.run(self.client.execute_query, query, params)
+    
+    async def get_patient_id(self, patient_identity: str) -> Optional[int]:
+        """Async SnowflakeClient.get_patient_id"""
+        return await self.run(self.client.get_patient_id, patient_identity)
+    
+    async def import_health_records(
+        self,
+        patient_identity: str,
+        records: List[HealthRecord],
+        import_source: str = "pdf_extraction",
+        import_stats: Optional[Dict] = None,
+    ) -> Dict[str, Any]:
+        """Async SnowflakeClient.import_health_records"""
+        return await self.run(
+            self.client.import_health_records,
+            patient_identity=patient_identity,
+            records=records,
+            import_source=import_source,
+            import_stats=import_stats,
+        )
+    
+    async def query_health_data(
+        self,
+        patient_identity: str,
+        query_type: str,
+        parameters: Optional[Dict] = None,
+    ) -> List[Dict]:
+        """Async SnowflakeClient.query_health_data"""
+        return await self.run(
+            self.client.query_health_data,
+            patient_identity=patient_identity,
+            query_type=query_type,
+            parameters=parameters,
+        )
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=wait)
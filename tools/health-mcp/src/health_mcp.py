@@ -4,9 +4,12 @@ Health Intelligence MCP Server
 Provides Model Context Protocol tools for health data import and querying
 """
 
+import asyncio
 import json
 import os
 import sys
+import threading
+from datetime import datetime
 from typing import Any
 
 # MCP Server SDK
@@ -25,7 +28,11 @@ from health_models import (
     MedicationRecord,
 )
 from snowflake_client import SnowflakeClient
+from snowflake_pool import PooledSnowflakeClient
+from async_snowflake_client import AsyncSnowflakeClient
 from semantic_query_executor import SemanticQueryExecutor
+from semantic_catalog import get_catalog
+from trend_cache import TrendCache
 
 
 # Initialize MCP Server
@@ -41,37 +48,93 @@ SNOWFLAKE_CONFIG = {
     "schema": os.getenv("SNOWFLAKE_SCHEMA", "HEALTH_RECORDS"),
 }
 
-# Global Snowflake client (initialized on first request)
-_snowflake_client: SnowflakeClient = None
+# Connection pool sizing (shared by all tool calls)
+SNOWFLAKE_POOL_CONFIG = {
+    "pool_min_size": int(os.getenv("SNOWFLAKE_POOL_MIN_SIZE", "1")),
+    "pool_max_size": int(os.getenv("SNOWFLAKE_POOL_MAX_SIZE", "4")),
+    "pool_idle_timeout": float(os.getenv("SNOWFLAKE_POOL_IDLE_TIMEOUT", "600")),
+    "pool_checkout_timeout": float(os.getenv("SNOWFLAKE_POOL_CHECKOUT_TIMEOUT", "30")),
+}
+
+# Worker threads for blocking Snowflake calls (defaults to the pool size)
+SNOWFLAKE_IO_WORKERS = int(os.getenv("SNOWFLAKE_IO_WORKERS", str(SNOWFLAKE_POOL_CONFIG["pool_max_size"])))
+
+# Semantic executor cache sizing (the executor lives as long as the server)
+SEMANTIC_CACHE_CONFIG = {
+    "intent_cache_size": int(os.getenv("SEMANTIC_INTENT_CACHE_SIZE", "1024")),
+    "sql_template_cache_size": int(os.getenv("SEMANTIC_SQL_TEMPLATE_CACHE_SIZE", "1024")),
+    "trend_cache_size": int(os.getenv("SEMANTIC_TREND_CACHE_SIZE", "256")),
+}
+
+# Global pooled Snowflake client (initialized on first request)
+_snowflake_client: PooledSnowflakeClient = None
+_async_snowflake_client: AsyncSnowflakeClient = None
+_client_lock = threading.Lock()
+
+# Global semantic query executor, shared by all tool calls so its caches
+# (SQL templates, trend series) stay warm between requests
+_semantic_executor: SemanticQueryExecutor = None
 
 
 def get_snowflake_client() -> SnowflakeClient:
-    """Get or initialize Snowflake client"""
+    """Get or initialize the pooled Snowflake client"""
     global _snowflake_client
     
-    if _snowflake_client is None:
-        _snowflake_client = SnowflakeClient(**SNOWFLAKE_CONFIG)
-        if not _snowflake_client.connect():
-            raise RuntimeError("Failed to connect to Snowflake")
+    with _client_lock:
+        if _snowflake_client is None:
+            client = PooledSnowflakeClient(**SNOWFLAKE_CONFIG, **SNOWFLAKE_POOL_CONFIG)
+            if not client.connect():
+                raise RuntimeError("Failed to connect to Snowflake")
+            _snowflake_client = client
     
     return _snowflake_client
 
 
+async def get_async_snowflake_client() -> AsyncSnowflakeClient:
+    """
+    Get or initialize the async Snowflake client
+    
+    Tool handlers must use this rather than calling the blocking client
+    directly, so a slow query never stalls the server's event loop.
+    """
+    global _async_snowflake_client
+    
+    if _async_snowflake_client is None:
+        # Opening the pool's first connections blocks, so do it off the loop
+        client = await asyncio.get_running_loop().run_in_executor(None, get_snowflake_client)
+        if _async_snowflake_client is None:
+            _async_snowflake_client = AsyncSnowflakeClient(client, max_workers=SNOWFLAKE_IO_WORKERS)
+    
+    return _async_snowflake_client
+
+
+async def get_semantic_executor() -> SemanticQueryExecutor:
+    """Get or initialize the server's long-lived semantic query executor"""
+    global _semantic_executor
+    
+    client = await get_async_snowflake_client()
+    if _semantic_executor is None:
+        _semantic_executor = SemanticQueryExecutor(
+            client.client,
+            trend_cache=TrendCache(maxsize=SEMANTIC_CACHE_CONFIG["trend_cache_size"]),
+            intent_cache_size=SEMANTIC_CACHE_CONFIG["intent_cache_size"],
+            sql_template_cache_size=SEMANTIC_CACHE_CONFIG["sql_template_cache_size"],
+        )
+    
+    return _semantic_executor
+
+
 # ============================================================================
 # TOOL 1: IMPORT HEALTH DATA
 # ============================================================================
 
-@server.call_tool()
-async def handle_import_health_data(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+async def handle_import_health_data(arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     """
     Import health records into Snowflake from JSON
     
     This tool accepts structured health records and imports them into the
     Health Intelligence database.
     """
-    if name != "import_health_data":
-        raise ValueError(f"Unknown tool: {name}")
-    
     try:
         # Parse request
         patient_identity = arguments.get("patient_identity")
@@ -112,15 +175,15 @@ async def handle_import_health_data(name: str, arguments: dict) -> list[types.Te
                 )]
         
         # Import to Snowflake
-        client = get_snowflake_client()
+        client = await get_async_snowflake_client()
         
         import_stats = {
             "total_records": len(records),
-            "import_timestamp": str(os.popen('date /t').read()),
+            "import_timestamp": datetime.now().isoformat(),
             "source": import_source,
         }
         
-        result = client.import_health_records(
+        result = await client.import_health_records(
             patient_identity=patient_identity,
             records=records,
             import_source=import_source,
@@ -153,17 +216,13 @@ Status: {result['success']}
 # TOOL 2: QUERY HEALTH DATA
 # ============================================================================
 
-@server.call_tool()
-async def handle_query_health_data(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+async def handle_query_health_data(arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     """
     Query health records with natural language or structured queries
     
     This tool allows querying imported health data using predefined
     query patterns or natural language interpretation.
     """
-    if name != "query_health_data":
-        raise ValueError(f"Unknown tool: {name}")
-    
     try:
         # Parse request
         patient_identity = arguments.get("patient_identity")
@@ -176,22 +235,14 @@ async def handle_query_health_data(name: str, arguments: dict) -> list[types.Tex
                 text="ERROR: patient_identity is required"
             )]
         
-        # Query Snowflake
-        client = get_snowflake_client()
-        results = client.query_health_data(
+        # Query Snowflake, formatting rows as they stream in
+        client = await get_async_snowflake_client()
+        rows = client.client.iter_health_data(
             patient_identity=patient_identity,
             query_type=query_type,
             parameters=query_params,
         )
-        
-        # Format results
-        if not results:
-            response = f"No records found for patient: {patient_identity}"
-        else:
-            # Format as readable table
-            response = f"Query Results ({len(results)} records):\n\n"
-            for i, row in enumerate(results, 1):
-                response += f"{i}. {json.dumps(row, indent=2)}\n\n"
+        response = await client.run(_format_query_results, rows, patient_identity)
         
         return [types.TextContent(type="text", text=response)]
         
@@ -201,25 +252,34 @@ async def handle_query_health_data(name: str, arguments: dict) -> list[types.Tex
         return [types.TextContent(type="text", text=error_msg)]
 
 
+def _format_query_results(rows, patient_identity: str) -> str:
+    """Format streamed query rows as a readable numbered list"""
+    formatted = []
+    for i, row in enumerate(rows, 1):
+        formatted.append(f"{i}. {json.dumps(row, indent=2, default=str)}\n\n")
+    
+    if not formatted:
+        return f"No records found for patient: {patient_identity}"
+    
+    return f"Query Results ({len(formatted)} records):\n\n" + "".join(formatted)
+
+
 # ============================================================================
 # TOOL 3: SEMANTIC QUERY (Natural Language to Insights)
 # ============================================================================
 
-@server.call_tool()
-async def handle_semantic_query(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+async def handle_semantic_query(arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
     """
     Query health data using natural language
     
     This tool converts natural language questions into SQL queries
     and returns human-readable insights.
     """
-    if name != "semantic_query":
-        raise ValueError(f"Unknown tool: {name}")
-    
     try:
         # Parse request
         patient_identity = arguments.get("patient_identity")
         natural_language_query = arguments.get("query")
+        cursor = arguments.get("cursor")
         
         if not patient_identity:
             return [types.TextContent(
@@ -233,12 +293,12 @@ async def handle_semantic_query(name: str, arguments: dict) -> list[types.TextCo
                 text="ERROR: query is required"
             )]
         
-        # Get Snowflake client and executor
-        client = get_snowflake_client()
-        executor = SemanticQueryExecutor(client)
+        # Get Snowflake client and the shared executor
+        client = await get_async_snowflake_client()
+        executor = await get_semantic_executor()
         
-        # Execute semantic query
-        result = executor.query(patient_identity, natural_language_query)
+        # Execute semantic query on the Snowflake worker pool
+        result = await client.run(executor.query, patient_identity, natural_language_query, cursor)
         
         if not result.get("success"):
             error_msg = result.get("error", "Unknown error")
@@ -258,7 +318,8 @@ Question: {result['query']}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
         
-        for insight in result.get('insights', [])[:5]:
+        # List answers are already paged, so every insight is shown
+        for insight in result.get('insights', []):
             insight_data = insight
             if isinstance(insight, dict):
                 title = insight.get('title', 'Result')
@@ -270,6 +331,9 @@ Question: {result['query']}
                 else:
                     response += f"\n✓ {title}: {value}"
         
+        if result.get('next_cursor'):
+            response += f"\n\nMore records available - pass cursor: {result['next_cursor']}"
+        
         response += f"""
 
 🔍 Query Details
@@ -286,6 +350,128 @@ Generated SQL: {result.get('sql', '')[:200]}...
         return [types.TextContent(type="text", text=error_msg)]
 
 
+# ============================================================================
+# TOOL 4: SEMANTIC QUERY MANY (Several Questions, One Round Trip)
+# ============================================================================
+
+async def handle_semantic_query_many(arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """
+    Answer several natural language questions about one patient
+    
+    Aggregate questions are fused into a single Snowflake query; each
+    question still gets its own insights.
+    """
+    try:
+        # Parse request
+        patient_identity = arguments.get("patient_identity")
+        questions = arguments.get("questions") or []
+        
+        if not patient_identity:
+            return [types.TextContent(
+                type="text",
+                text="ERROR: patient_identity is required"
+            )]
+        
+        if not questions:
+            return [types.TextContent(
+                type="text",
+                text="ERROR: questions is required"
+            )]
+        
+        # Get Snowflake client and the shared executor
+        client = await get_async_snowflake_client()
+        executor = await get_semantic_executor()
+        
+        # Execute all questions on the Snowflake worker pool
+        result = await client.run(executor.query_many, patient_identity, questions)
+        
+        if not result.get("success"):
+            error_msg = result.get("error", "Unknown error")
+            return [types.TextContent(
+                type="text",
+                text=f"Query failed: {error_msg}"
+            )]
+        
+        # Format response
+        response = f"""
+💡 Natural Language Queries ({result['succeeded']}/{len(questions)} answered)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+"""
+        
+        for question_result in result.get('results', []):
+            response += f"\nQuestion: {question_result['query']}"
+            if not question_result.get('success'):
+                response += f"\n✗ {question_result.get('error', 'Unknown error')}\n"
+                continue
+            
+            for insight in question_result.get('insights', [])[:5]:
+                title = insight.get('title', 'Result')
+                value = insight.get('value', '')
+                unit = insight.get('unit', '')
+                
+                if unit:
+                    response += f"\n✓ {title}: {value} {unit}"
+                else:
+                    response += f"\n✓ {title}: {value}"
+            response += "\n"
+        
+        return [types.TextContent(type="text", text=response)]
+        
+    except Exception as e:
+        error_msg = f"ERROR in semantic_query_many: {str(e)}"
+        print(error_msg, file=sys.stderr)
+        return [types.TextContent(type="text", text=error_msg)]
+
+
+# ============================================================================
+# TOOL 5: CACHE STATISTICS
+# ============================================================================
+
+async def handle_cache_stats(arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """
+    Report hit rates and sizes of the server's caches
+    
+    Covers the semantic executor's caches plus the Snowflake connection pool.
+    """
+    try:
+        executor = await get_semantic_executor()
+        stats = executor.cache_stats()
+        if isinstance(executor.client, PooledSnowflakeClient):
+            stats["connection_pool"] = executor.client.pool_stats()
+        
+        return [types.TextContent(type="text", text=json.dumps(stats, indent=2))]
+        
+    except Exception as e:
+        error_msg = f"ERROR in cache_stats: {str(e)}"
+        print(error_msg, file=sys.stderr)
+        return [types.TextContent(type="text", text=error_msg)]
+
+
+# ============================================================================
+# TOOL DISPATCH
+# ============================================================================
+
+# The MCP server keeps a single call_tool handler, so every tool is routed
+# through handle_call_tool by name
+TOOL_HANDLERS = {
+    "import_health_data": handle_import_health_data,
+    "query_health_data": handle_query_health_data,
+    "semantic_query": handle_semantic_query,
+    "semantic_query_many": handle_semantic_query_many,
+    "cache_stats": handle_cache_stats,
+}
+
+
+@server.call_tool()
+async def handle_call_tool(name: str, arguments: dict) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Dispatch a tool call to the handler registered for its name"""
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        raise ValueError(f"Unknown tool: {name}")
+    
+    return await handler(arguments or {})
+
+
 # ============================================================================
 # TOOL DEFINITIONS
 # ============================================================================
@@ -387,10 +573,41 @@ async def handle_list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "Natural language question (e.g., 'What was my average blood glucose last year?')",
                     },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous response, to get the next page of a list question",
+                    },
                 },
                 "required": ["patient_identity", "query"],
             },
         ),
+        Tool(
+            name="semantic_query_many",
+            description="Answer several natural language questions about one patient in a single call",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "patient_identity": {
+                        "type": "string",
+                        "description": "Patient name or identifier",
+                    },
+                    "questions": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Natural language questions (e.g., ['How many active medications do I have?', 'What was my average blood glucose last year?'])",
+                    },
+                },
+                "required": ["patient_identity", "questions"],
+            },
+        ),
+        Tool(
+            name="cache_stats",
+            description="Show hit rates and sizes of the server's query caches and connection pool",
+            inputSchema={
+                "type": "object",
+                "properties": {},
+            },
+        ),
     ]
 
 
@@ -417,6 +634,18 @@ async def main():
         print(f"   Account:  {SNOWFLAKE_CONFIG['account_id']}")
         print(f"   Database: {SNOWFLAKE_CONFIG['database']}")
         print(f"   Schema:   {SNOWFLAKE_CONFIG['schema']}")
+        print(f"   Pool:     {SNOWFLAKE_POOL_CONFIG['pool_min_size']}-{SNOWFLAKE_POOL_CONFIG['pool_max_size']} connections")
+        
+        # Compile the query vocabulary now rather than on the first question
+        catalog = get_catalog()
+        print(f"   Catalog:  {len(catalog.matcher)} phrases")
+        
+        # Build the shared executor (and its NL mapper) before the first request
+        try:
+            await get_semantic_executor()
+            print("   Executor: ready")
+        except Exception as e:
+            print(f"WARNING: Semantic executor not started, will retry on first query: {e}", file=sys.stderr)
         print("\n✓ Server ready. Waiting for connections...\n")
 
 
@@ -6,6 +6,10 @@ Maps domain vocabulary and natural language patterns to SQL queries
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+
+from semantic_catalog import SemanticCatalog, get_catalog
+from ttl_cache import TTLCache
 
 
 class RecordType(str, Enum):
@@ -35,243 +39,232 @@ class QueryIntent:
 class NLMapper:
     """Maps natural language queries to SQL"""
     
-    # Vocabulary mappings
-    RECORD_TYPE_SYNONYMS = {
-        # Lab tests
-        "lab": RecordType.LAB,
-        "labs": RecordType.LAB,
-        "lab test": RecordType.LAB,
-        "lab result": RecordType.LAB,
-        "lab results": RecordType.LAB,
-        "laboratory": RecordType.LAB,
-        "test": RecordType.LAB,
-        "results": RecordType.LAB,
-        
-        # Vitals
-        "vital": RecordType.VITAL,
-        "vitals": RecordType.VITAL,
-        "vital sign": RecordType.VITAL,
-        "vital signs": RecordType.VITAL,
-        "blood pressure": RecordType.VITAL,
-        "bp": RecordType.VITAL,
-        "heart rate": RecordType.VITAL,
-        "hr": RecordType.VITAL,
-        "temperature": RecordType.VITAL,
-        "temp": RecordType.VITAL,
-        "oxygen": RecordType.VITAL,
-        "resp rate": RecordType.VITAL,
-        
-        # Medications
-        "medication": RecordType.MEDICATION,
-        "medications": RecordType.MEDICATION,
-        "med": RecordType.MEDICATION,
-        "meds": RecordType.MEDICATION,
-        "drug": RecordType.MEDICATION,
-        "drugs": RecordType.MEDICATION,
-        "prescription": RecordType.MEDICATION,
-        "prescriptions": RecordType.MEDICATION,
-        
-        # Conditions
-        "condition": RecordType.CONDITION,
-        "conditions": RecordType.CONDITION,
-        "diagnosis": RecordType.CONDITION,
-        "diagnoses": RecordType.CONDITION,
-        "problem": RecordType.CONDITION,
-        "problems": RecordType.CONDITION,
-        
-        # Allergies
-        "allergy": RecordType.ALLERGY,
-        "allergies": RecordType.ALLERGY,
-        "sensitivity": RecordType.ALLERGY,
-        "sensitivities": RecordType.ALLERGY,
-        
-        # Immunizations
-        "immunization": RecordType.IMMUNIZATION,
-        "immunizations": RecordType.IMMUNIZATION,
-        "vaccine": RecordType.IMMUNIZATION,
-        "vaccines": RecordType.IMMUNIZATION,
-        "shot": RecordType.IMMUNIZATION,
-        "shots": RecordType.IMMUNIZATION,
-        
-        # Encounters
-        "encounter": RecordType.ENCOUNTER,
-        "encounters": RecordType.ENCOUNTER,
-        "visit": RecordType.ENCOUNTER,
-        "visits": RecordType.ENCOUNTER,
-        "appointment": RecordType.ENCOUNTER,
-        "appointments": RecordType.ENCOUNTER,
-        
-        # Notes
-        "note": RecordType.NOTE,
-        "notes": RecordType.NOTE,
-        "clinical note": RecordType.NOTE,
-        "doctor note": RecordType.NOTE,
-    }
+    # Typed projection tables: (table, numeric value column, attribute column)
+    LAB_SOURCE = ("LAB_RESULTS", "result_numeric", "test_key")
+    VITAL_SOURCE = ("VITAL_READINGS", "value_numeric", "vital_key")
     
-    # Test name mappings (for lab results)
-    TEST_NAME_PATTERNS = {
-        "glucose": ["Glucose", "Fasting Glucose", "Blood Sugar"],
-        "cholesterol": ["Cholesterol", "Total Cholesterol", "LDL", "HDL", "Triglycerides"],
-        "ldl": ["LDL", "Low-density lipoprotein"],
-        "hdl": ["HDL", "High-density lipoprotein"],
-        "triglycerides": ["Triglycerides"],
-        "a1c": ["A1C", "HbA1c", "Hemoglobin A1c"],
-        "thyroid": ["TSH", "T3", "T4", "Free T4"],
-        "hemoglobin": ["Hemoglobin", "Hgb", "CBC"],
-        "creatinine": ["Creatinine", "Kidney Function"],
-        "bun": ["BUN", "Blood Urea Nitrogen"],
-    }
+    # Rollup tables by bucket granularity (see MEASUREMENT_DAILY / _MONTHLY)
+    DAILY_ROLLUP = "MEASUREMENT_DAILY"
+    MONTHLY_ROLLUP = "MEASUREMENT_MONTHLY"
     
-    # Time period mappings
-    TIME_PERIOD_PATTERNS = {
-        "today": 0,
-        "yesterday": 1,
-        "last week": 7,
-        "last 7 days": 7,
-        "last 2 weeks": 14,
-        "last month": 30,
-        "last 30 days": 30,
-        "last 3 months": 90,
-        "last 6 months": 180,
-        "last year": 365,
-        "last 12 months": 365,
-        "this year": 365,
-        "past year": 365,
-        "all time": None,  # No time limit
-    }
+    # Stands in for the patient id in SQL templates (see sql_template)
+    PATIENT_PARAM = object()
     
-    # Metric patterns
-    METRIC_PATTERNS = {
-        "average": ["average", "avg", "mean"],
-        "maximum": ["maximum", "max", "highest"],
-        "minimum": ["minimum", "min", "lowest"],
-        "count": ["count", "how many", "number of"],
-        "trend": ["trend", "change", "improvement"],
-        "list": ["list", "show", "display", "get"],
-    }
+    def __init__(
+        self,
+        catalog: Optional[SemanticCatalog] = None,
+        intent_cache_size: int = 1024,
+        template_cache_size: int = 1024,
+    ):
+        """
+        Initialize mapper
+        
+        Args:
+            catalog: Vocabulary to map with (default: the process-wide
+                catalog compiled from the semantic model)
+            intent_cache_size: Parsed questions memoized by exact and by
+                normalized text (0 disables the memo)
+            template_cache_size: SQL templates memoized by intent shape and
+                page (0 disables the memo)
+        """
+        self.catalog = catalog or get_catalog()
+        self._parse_exact = None
+        self._parse_normalized = None
+        if intent_cache_size:
+            # functools LRUs (C implementation) keep repeat lookups well
+            # under a microsecond; exact text skips normalizing altogether
+            self._parse_normalized = lru_cache(maxsize=intent_cache_size)(self._parse_intent)
+            self._parse_exact = lru_cache(maxsize=intent_cache_size)(self._parse_text)
+        self._templates = TTLCache(maxsize=template_cache_size, ttl=None) if template_cache_size else None
     
     def parse_intent(self, query: str) -> QueryIntent:
-        """Parse natural language query into intent"""
-        query_lower = query.lower().strip()
+        """
+        Parse natural language query into intent
+        
+        Repeat questions (ignoring case and spacing) are answered from a
+        memo, and equal questions share one QueryIntent, so treat the
+        result as read-only.
+        """
+        if self._parse_exact is None:
+            return self._parse_intent(query)
+        return self._parse_exact(query)
+    
+    def _parse_text(self, query: str) -> QueryIntent:
+        """Memo miss on the exact text: retry under the normalized text"""
+        return self._parse_normalized(" ".join(query.lower().split()))
+    
+    def cache_stats(self) -> Dict[str, Dict]:
+        """Hit/miss counters of the intent and SQL template memos"""
+        stats = {}
+        if self._parse_exact is not None:
+            exact = self._parse_exact.cache_info()
+            normalized = self._parse_normalized.cache_info()
+            # Misses are questions that actually had to be parsed
+            hits = exact.hits + normalized.hits
+            lookups = hits + normalized.misses
+            stats["intents"] = {
+                "size": normalized.currsize,
+                "maxsize": normalized.maxsize,
+                "hits": hits,
+                "misses": normalized.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "exact_hits": exact.hits,
+            }
+        if self._templates is not None:
+            stats["sql_templates"] = self._templates.stats()
+        return stats
+    
+    def _parse_intent(self, query: str) -> QueryIntent:
+        """Parse a question with the phrase matcher (one pass over the query tokens)"""
+        slots = self.catalog.matcher.match_slots(query)
         
-        # Initialize intent
+        record_type = slots.get("record_type")
         intent = QueryIntent(
-            record_type=None,
-            metric=None,
-            time_period=None,
-            attribute=None,
-            filter_condition=None,
-            sort_order=None,
+            record_type=RecordType(record_type) if record_type else None,
+            metric=slots.get("metric"),
+            time_period=slots.get("time_period"),
+            attribute=slots.get("test") or slots.get("vital"),
+            filter_condition=slots.get("filter"),
+            sort_order=slots.get("sort", "DESC"),  # Default to recent first
             raw_query=query,
         )
         
-        # Extract record type
-        for synonym, record_type in self.RECORD_TYPE_SYNONYMS.items():
-            if synonym in query_lower:
-                intent.record_type = record_type
-                break
+        # A named test or vital sign implies its record type
+        if intent.record_type is None:
+            if "test" in slots:
+                intent.record_type = RecordType.LAB
+            elif "vital" in slots:
+                intent.record_type = RecordType.VITAL
         
-        # Extract metric type
-        for metric, patterns in self.METRIC_PATTERNS.items():
-            for pattern in patterns:
-                if pattern in query_lower:
-                    intent.metric = metric
-                    break
-            if intent.metric:
-                break
+        return intent
+    
+    def intent_to_sql(
+        self,
+        intent: QueryIntent,
+        patient_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[str, List]:
+        """
+        Convert parsed intent to a SQL template and its bind parameters
         
-        # Extract time period
-        for time_phrase, days in self.TIME_PERIOD_PATTERNS.items():
-            if time_phrase in query_lower:
-                intent.time_period = time_phrase
-                break
+        Values (patient, attribute pattern, day window) are always ?
+        placeholders bound server-side, so every question of the same shape
+        produces the same SQL text regardless of patient or wording.
         
-        # Extract test name (for labs)
-        for test_key, test_names in self.TEST_NAME_PATTERNS.items():
-            for test_name in test_names:
-                if test_name.lower() in query_lower:
-                    intent.attribute = test_key
-                    break
-            if intent.attribute:
-                break
+        Args:
+            intent: Parsed query intent
+            patient_id: Patient database ID
+            limit: For list queries, return only this many rows (starting at
+                offset) plus a total_count column with the full match count
+            offset: Rows to skip before the returned page
         
-        # Extract filter keywords
-        if "abnormal" in query_lower:
-            intent.filter_condition = "abnormal"
-        elif "active" in query_lower:
-            intent.filter_condition = "active"
-        elif "recent" in query_lower:
-            intent.filter_condition = "recent"
+        Returns:
+            Tuple of (SQL with ? placeholders, parameter list)
+        """
+        sql, params = self.sql_template(intent, limit, offset)
+        return sql, [patient_id if param is self.PATIENT_PARAM else param for param in params]
+    
+    def sql_template(
+        self,
+        intent: QueryIntent,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[str, List]:
+        """
+        Patient-independent SQL for an intent, memoized by intent shape
         
-        # Extract sort order
-        if "ascending" in query_lower or "oldest first" in query_lower:
-            intent.sort_order = "ASC"
-        elif "descending" in query_lower or "newest first" in query_lower or "most recent" in query_lower:
-            intent.sort_order = "DESC"
-        else:
-            intent.sort_order = "DESC"  # Default to recent first
+        Returns:
+            Tuple of (SQL, parameters with PATIENT_PARAM where the patient
+            id is bound)
+        """
+        if self._templates is None:
+            return self._compile_sql(intent, self.PATIENT_PARAM, limit, offset)
         
-        return intent
+        key = (
+            intent.record_type,
+            intent.metric,
+            intent.time_period,
+            intent.attribute,
+            intent.filter_condition,
+            intent.sort_order,
+            limit,
+            offset,
+        )
+        template = self._templates.get(key)
+        if template is None:
+            template = self._compile_sql(intent, self.PATIENT_PARAM, limit, offset)
+            self._templates.set(key, template)
+        return template
     
-    def intent_to_sql(self, intent: QueryIntent, patient_id: int) -> str:
-        """Convert parsed intent to SQL query"""
+    def _compile_sql(
+        self,
+        intent: QueryIntent,
+        patient_id,
+        limit: Optional[int],
+        offset: int,
+    ) -> Tuple[str, List]:
+        """Assemble the SQL and bind parameters for an intent"""
+        
+        source = self._measurement_source(intent)
+        aggregate = intent.metric in self.catalog.metric_functions
+        if aggregate and source is not None:
+            rollup = self._rollup_table(intent)
+            if rollup is not None:
+                return self._rollup_aggregate_sql(intent, patient_id, source, rollup)
+            return self._measurement_aggregate_sql(intent, patient_id, source)
         
         # Build SELECT clause
         if intent.metric == "count":
             select_clause = "SELECT COUNT(*) as result_count"
-        elif intent.metric == "average":
-            # Extract numeric values from JSON result_value field
+        elif aggregate:
+            # Extract numeric values from the parsed result_value path
             # Handle values like "98 mg/dL" by splitting on space and taking first part
-            select_clause = """SELECT 
-                AVG(TRY_CAST(SPLIT_PART(TRY_PARSE_JSON(data_json):result_value::STRING, ' ', 1) AS FLOAT)) as result_average,
-                COUNT(*) as record_count"""
-        elif intent.metric == "maximum":
-            select_clause = """SELECT 
-                MAX(TRY_CAST(SPLIT_PART(TRY_PARSE_JSON(data_json):result_value::STRING, ' ', 1) AS FLOAT)) as result_maximum,
-                COUNT(*) as record_count"""
-        elif intent.metric == "minimum":
-            select_clause = """SELECT 
-                MIN(TRY_CAST(SPLIT_PART(TRY_PARSE_JSON(data_json):result_value::STRING, ' ', 1) AS FLOAT)) as result_minimum,
+            select_clause = f"""SELECT 
+                {self.catalog.metric_functions[intent.metric]}(TRY_CAST(SPLIT_PART(data_variant:result_value::STRING, ' ', 1) AS FLOAT)) as result_{intent.metric},
                 COUNT(*) as record_count"""
         else:  # list/show
             select_clause = "SELECT record_date, data_json, provider_identity, extraction_confidence"
+            if limit is not None:
+                # Total matches computed before LIMIT applies, in the same scan
+                select_clause += ", COUNT(*) OVER () as total_count"
         
         # Build FROM clause
         from_clause = "FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS"
         
         # Build WHERE clause
-        where_conditions = [f"patient_id = {patient_id}"]
+        where_conditions = ["patient_id = ?"]
+        params = [patient_id]
         
         # Add record type filter
         if intent.record_type:
             where_conditions.append(f"record_class = '{intent.record_type.value}'")
         
-        # Add attribute filter (for lab tests, etc.) - use ILIKE for case-insensitive matching
-        if intent.attribute:
-            where_conditions.append(f"data_json ILIKE '%{intent.attribute}%'")
+        # Add attribute filter (for lab tests and vital signs) via the typed projection
+        if intent.attribute and source is not None:
+            table, _, attribute_column = source
+            predicate, value = self._attribute_predicate(intent, attribute_column, source)
+            where_conditions.append(
+                f"record_id IN (SELECT record_id FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.{table} "
+                f"WHERE patient_id = ? AND {predicate})"
+            )
+            params.extend([patient_id, value])
+        elif intent.attribute:
+            where_conditions.append("data_variant:test_name::STRING ILIKE ?")
+            params.append(f"%{intent.attribute}%")
         
-        # Add filter condition - use ILIKE for case-insensitive matching
-        if intent.filter_condition:
-            if intent.filter_condition == "abnormal":
-                where_conditions.append(f"data_json ILIKE '%abnormal%'")
-            elif intent.filter_condition == "active":
-                where_conditions.append(f"(data_json ILIKE '%active%' OR data_json ILIKE '%ongoing%')")
-            elif intent.filter_condition == "recent":
-                where_conditions.append(f"record_date >= DATEADD(day, -30, CURRENT_DATE())")
+        # Add filter condition - path predicates on data_variant (search optimized)
+        if intent.filter_condition in self.catalog.filter_conditions:
+            where_conditions.append(self.catalog.filter_conditions[intent.filter_condition])
         
-        # Add time period filter
-        if intent.time_period:
-            days = self.TIME_PERIOD_PATTERNS.get(intent.time_period)
-            if days is not None:
-                where_conditions.append(
-                    f"record_date >= DATEADD(day, -{days}, CURRENT_DATE())"
-                )
+        # Add recency and time period filters
+        self._add_time_conditions(intent, where_conditions, params)
         
         where_clause = "WHERE " + " AND ".join(where_conditions)
         
-        # Build ORDER BY clause
-        if intent.metric not in ["count", "average", "maximum", "minimum"]:
-            order_clause = f"ORDER BY record_date {intent.sort_order}"
+        # Build ORDER BY clause (record_id breaks date ties so pages are stable)
+        if not aggregate:
+            order_clause = f"ORDER BY record_date {intent.sort_order}, record_id {intent.sort_order}"
         else:
             order_clause = ""
         
@@ -279,11 +272,145 @@ class NLMapper:
         sql_parts = [select_clause, from_clause, where_clause]
         if order_clause:
             sql_parts.append(order_clause)
+        if not aggregate and limit is not None:
+            sql_parts.append("LIMIT ? OFFSET ?")
+            params.extend([int(limit), int(offset)])
+        
+        return "\n".join(sql_parts), params
+    
+    def _measurement_source(self, intent: QueryIntent) -> Optional[Tuple[str, str, str]]:
+        """Typed projection table answering this intent, if any"""
+        if intent.attribute in self.catalog.test_patterns:
+            return self.LAB_SOURCE
+        if intent.attribute in self.catalog.vital_patterns:
+            return self.VITAL_SOURCE
+        if intent.attribute is None and intent.record_type == RecordType.LAB:
+            return self.LAB_SOURCE
+        if intent.attribute is None and intent.record_type == RecordType.VITAL:
+            return self.VITAL_SOURCE
+        return None
+    
+    def _attribute_predicate(
+        self,
+        intent: QueryIntent,
+        attribute_column: str,
+        source: Optional[Tuple[str, str, str]] = None,
+    ) -> Tuple[str, str]:
+        """Predicate (and its bind value) matching the attribute against a test / vital key column"""
+        if (source or self._measurement_source(intent)) == self.VITAL_SOURCE:
+            return f"{attribute_column} = ?", intent.attribute
+        return f"{attribute_column} LIKE ?", f"%{intent.attribute}%"
+    
+    def _add_time_conditions(
+        self,
+        intent: QueryIntent,
+        conditions: List[str],
+        params: List,
+        date_column: str = "record_date",
+    ) -> bool:
+        """Append date predicates for the time period and recency filter; True if any"""
+        windows = []
+        if intent.filter_condition in self.catalog.filter_days:
+            windows.append(self.catalog.filter_days[intent.filter_condition])
+        if intent.time_period:
+            days = self.catalog.time_periods.get(intent.time_period)
+            if days is not None:
+                windows.append(days)
+        
+        for days in windows:
+            conditions.append(f"{date_column} >= DATEADD(day, -?, CURRENT_DATE())")
+            params.append(days)
+        return bool(windows)
+    
+    def _rollup_table(self, intent: QueryIntent) -> Optional[str]:
+        """
+        Rollup table that can answer an aggregate exactly, if any
+        
+        Day windows line up with daily buckets; unbounded questions can use
+        monthly buckets. Record-level filter conditions (e.g. abnormal)
+        cannot be answered from rollups.
+        """
+        if intent.filter_condition in self.catalog.filter_conditions:
+            return None
+        if intent.metric not in self.catalog.metric_rollups:
+            return None
+        if self._add_time_conditions(intent, [], []):
+            return self.DAILY_ROLLUP
+        return self.MONTHLY_ROLLUP
+    
+    def _rollup_aggregate_sql(
+        self,
+        intent: QueryIntent,
+        patient_id: int,
+        source: Tuple[str, str, str],
+        rollup: str,
+    ) -> Tuple[str, List]:
+        """Aggregate from pre-summed rollup buckets instead of individual rows"""
+        value = self.catalog.metric_rollups[intent.metric]
+        if intent.metric == "count":
+            select_clause = f"SELECT COALESCE({value}, 0) as result_count"
+        else:
+            select_clause = f"""SELECT 
+                {value} as result_{intent.metric},
+                COALESCE(SUM(record_count), 0) as record_count"""
+        
+        measure_class = "VITAL" if source == self.VITAL_SOURCE else "LAB"
+        where_conditions = ["patient_id = ?", f"measure_class = '{measure_class}'"]
+        params = [patient_id]
+        if intent.attribute:
+            predicate, value = self._attribute_predicate(intent, "measure_key", source)
+            where_conditions.append(predicate)
+            params.append(value)
+        self._add_time_conditions(intent, where_conditions, params, "bucket_date")
+        
+        return "\n".join([
+            select_clause,
+            f"FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.{rollup}",
+            "WHERE " + " AND ".join(where_conditions),
+        ]), params
+    
+    def _measurement_aggregate_sql(
+        self,
+        intent: QueryIntent,
+        patient_id: int,
+        source: Tuple[str, str, str],
+    ) -> Tuple[str, List]:
+        """Aggregate over a typed projection table's native numeric column"""
+        table, value_column, attribute_column = source
+        
+        if intent.metric == "count":
+            select_clause = "SELECT COUNT(*) as result_count"
+        else:
+            function = self.catalog.metric_functions[intent.metric]
+            select_clause = f"""SELECT 
+                {function}({value_column}) as result_{intent.metric},
+                COUNT(*) as record_count"""
+        
+        where_conditions = ["patient_id = ?"]
+        params = [patient_id]
+        if intent.attribute:
+            predicate, value = self._attribute_predicate(intent, attribute_column, source)
+            where_conditions.append(predicate)
+            params.append(value)
+        if intent.filter_condition == "abnormal" and table == "LAB_RESULTS":
+            where_conditions.append("abnormal_flag IS NOT NULL")
+        elif intent.filter_condition in self.catalog.filter_conditions:
+            # Other record filters are predicates on the source HEALTH_RECORDS rows
+            where_conditions.append(
+                "record_id IN (SELECT record_id FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS "
+                f"WHERE patient_id = ? AND {self.catalog.filter_conditions[intent.filter_condition]})"
+            )
+            params.append(patient_id)
+        self._add_time_conditions(intent, where_conditions, params)
         
-        return "\n".join(sql_parts)
+        return "\n".join([
+            select_clause,
+            f"FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.{table}",
+            "WHERE " + " AND ".join(where_conditions),
+        ]), params
 
 
-def nl_to_sql(query: str, patient_id: int) -> Tuple[QueryIntent, str]:
+def nl_to_sql(query: str, patient_id: int) -> Tuple[QueryIntent, str, List]:
     """
     Convert natural language query to SQL
     
@@ -292,9 +419,9 @@ def nl_to_sql(query: str, patient_id: int) -> Tuple[QueryIntent, str]:
         patient_id: Patient database ID
         
     Returns:
-        Tuple of (parsed intent, SQL query)
+        Tuple of (parsed intent, SQL template, bind parameters)
     """
     mapper = NLMapper()
     intent = mapper.parse_intent(query)
-    sql = mapper.intent_to_sql(intent, patient_id)
-    return intent, sql
+    sql, params = mapper.intent_to_sql(intent, patient_id)
+    return intent, sql, params
@@ -0,0 +1,116 @@
+"""
+Phrase Matcher
+Token-boundary multi-phrase matcher used to extract query slots in one pass
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple
+
+
+class PhraseMatch(NamedTuple):
+    """One vocabulary phrase found in a text"""
+    slot: str  # Vocabulary the phrase belongs to (e.g. "metric")
+    value: Any  # What the phrase maps to within that slot
+    start: int  # Token offset of the match
+    length: int  # Number of tokens matched
+    rank: int  # Registration order; lower ranks win ties
+
+
+class PhraseMatcher:
+    """
+    Token trie over a set of phrases with leftmost-longest matching
+    
+    Phrases and texts are split into lowercase alphanumeric tokens, so
+    phrases only match on token boundaries ("hr" does not match inside
+    "three"). Scanning walks the trie from each token once, taking the
+    longest phrase that starts there and continuing after it, so lookup
+    cost depends on the text length rather than the vocabulary size.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    # Trie node key holding the payloads of phrases ending at that node
+    # (never a token, since tokens are non-empty)
+    _PAYLOADS = ""
+    
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        """Split text into lowercase alphanumeric tokens"""
+        return cls.TOKEN_PATTERN.findall(text.lower())
+    
+    def add(self, phrase: str, slot: str, value: Any):
+        """
+        Register a phrase
+        
+        Args:
+            phrase: Text to match (case and punctuation are ignored)
+            slot: Vocabulary the phrase belongs to
+            value: Value reported when the phrase matches
+        """
+        tokens = self.tokenize(phrase)
+        if not tokens:
+            return
+        
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(self._PAYLOADS, []).append((slot, value, self._size))
+        self._size += 1
+    
+    def add_vocabulary(self, slot: str, vocabulary: Dict[Any, List[str]]):
+        """Register every phrase of a {value: [phrases]} mapping under one slot"""
+        for value, phrases in vocabulary.items():
+            for phrase in phrases:
+                self.add(phrase, slot, value)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def find_all(self, text: str) -> List[PhraseMatch]:
+        """Non-overlapping matches in text, leftmost-longest first"""
+        tokens = self.tokenize(text)
+        matches = []
+        
+        position = 0
+        while position < len(tokens):
+            node = self._root
+            longest_end = None
+            longest_payloads = None
+            
+            end = position
+            while end < len(tokens):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                end += 1
+                payloads = node.get(self._PAYLOADS)
+                if payloads:
+                    longest_end, longest_payloads = end, payloads
+            
+            if longest_end is None:
+                position += 1
+                continue
+            
+            for slot, value, rank in longest_payloads:
+                matches.append(PhraseMatch(slot, value, position, longest_end - position, rank))
+            position = longest_end
+        
+        return matches
+    
+    def match_slots(self, text: str) -> Dict[str, Any]:
+        """
+        Best value per slot
+        
+        Within a slot the longest phrase wins; equally long phrases are
+        settled by registration order.
+        """
+        best: Dict[str, PhraseMatch] = {}
+        for match in self.find_all(text):
+            current = best.get(match.slot)
+            if current is None or (-match.length, match.rank) < (-current.length, current.rank):
+                best[match.slot] = match
+        return {slot: match.value for slot, match in best.items()}
@@ -0,0 +1,175 @@
+"""
+Semantic Catalog
+Query vocabulary compiled from the semantic model YAML, with a pickle cache
+"""
+
+import os
+import pickle
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from phrase_matcher import PhraseMatcher
+
+
+# Semantic model shipped with the repo (override with HEALTH_SEMANTIC_MODEL)
+DEFAULT_MODEL_PATH = (
+    Path(__file__).resolve().parents[3]
+    / "semantic-model" / "snowflake" / "health_intelligence_semantic_model.yaml"
+)
+
+# Compiled catalog cache (override with HEALTH_CATALOG_CACHE, "" disables)
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "health-mcp" / "semantic_catalog.pickle"
+
+# Bump when SemanticCatalog's fields change so stale caches are rebuilt
+CATALOG_FORMAT = 1
+
+
+@dataclass
+class SemanticCatalog:
+    """Lookup structures the NL mapper and executor need from the semantic model"""
+    record_type_synonyms: Dict[str, str]  # phrase -> record class
+    metric_patterns: Dict[str, List[str]]  # metric -> phrases
+    metric_functions: Dict[str, str]  # metric -> aggregate function (AVG, ...)
+    metric_rollups: Dict[str, str]  # metric -> expression over rollup buckets
+    time_periods: Dict[str, Optional[int]]  # phrase -> days (None = all time)
+    test_patterns: Dict[str, List[str]]  # lab test key -> names
+    vital_patterns: Dict[str, List[str]]  # vital key -> names
+    filter_patterns: Dict[str, List[str]]  # filter -> phrases
+    filter_conditions: Dict[str, str]  # filter -> HEALTH_RECORDS predicate
+    filter_days: Dict[str, int]  # filter -> record_date window
+    sort_patterns: Dict[str, List[str]]  # ASC/DESC -> phrases
+    units: Dict[str, str]  # test / vital key -> display unit
+    matcher: Optional[PhraseMatcher] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        if self.matcher is None:
+            self.matcher = self.compile()
+    
+    def compile(self) -> PhraseMatcher:
+        """
+        Build the phrase matcher over every vocabulary
+        
+        Test keys are registered before test names so that, among equally
+        long phrases, "ldl" means LDL rather than cholesterol.
+        """
+        matcher = PhraseMatcher()
+        for synonym, record_type in self.record_type_synonyms.items():
+            matcher.add(synonym, "record_type", record_type)
+        matcher.add_vocabulary("metric", self.metric_patterns)
+        for time_phrase in self.time_periods:
+            matcher.add(time_phrase, "time_period", time_phrase)
+        for test_key in self.test_patterns:
+            matcher.add(test_key, "test", test_key)
+        matcher.add_vocabulary("test", self.test_patterns)
+        matcher.add_vocabulary("vital", self.vital_patterns)
+        matcher.add_vocabulary("filter", self.filter_patterns)
+        matcher.add_vocabulary("sort", self.sort_patterns)
+        return matcher
+    
+    @classmethod
+    def from_model(cls, model: Dict[str, Any]) -> "SemanticCatalog":
+        """Build a catalog from a parsed semantic model document"""
+        vocabulary = model.get("vocabulary") or {}
+        
+        # Record class synonyms live on the health_records.record_class column
+        record_class = model["tables"]["health_records"]["columns"]["record_class"]
+        record_type_synonyms = {}
+        for entry in record_class.get("properties", {}).get("synonyms", []):
+            for phrase, value in entry.items():
+                record_type_synonyms[str(phrase).lower()] = value
+        
+        metrics = vocabulary.get("metrics") or {}
+        tests = vocabulary.get("tests") or {}
+        vitals = vocabulary.get("vitals") or {}
+        filters = vocabulary.get("filters") or {}
+        
+        units = {}
+        for key, spec in list(tests.items()) + list(vitals.items()):
+            if spec.get("unit"):
+                units[str(key).lower()] = spec["unit"]
+        
+        return cls(
+            record_type_synonyms=record_type_synonyms,
+            metric_patterns={name: list(spec.get("phrases", [])) for name, spec in metrics.items()},
+            metric_functions={name: spec["function"] for name, spec in metrics.items() if spec.get("function")},
+            metric_rollups={name: spec["rollup"] for name, spec in metrics.items() if spec.get("rollup")},
+            time_periods=dict(vocabulary.get("time_periods") or {}),
+            test_patterns={str(key): list(spec.get("phrases", [])) for key, spec in tests.items()},
+            vital_patterns={str(key): list(spec.get("phrases", [])) for key, spec in vitals.items()},
+            filter_patterns={name: list(spec.get("phrases", [])) for name, spec in filters.items()},
+            filter_conditions={name: spec["condition"] for name, spec in filters.items() if spec.get("condition")},
+            filter_days={name: int(spec["days"]) for name, spec in filters.items() if spec.get("days") is not None},
+            sort_patterns={str(order): list(phrases) for order, phrases in (vocabulary.get("sort_orders") or {}).items()},
+            units=units,
+        )
+
+
+def load_catalog(
+    model_path: Optional[Path] = None,
+    cache_path: Optional[Path] = None,
+) -> SemanticCatalog:
+    """
+    Load the semantic catalog, reusing the compiled pickle when it is current
+    
+    The cache is keyed on the model file's path, size and modification time,
+    so editing the YAML triggers a rebuild on the next load.
+    
+    Args:
+        model_path: Semantic model YAML (default: HEALTH_SEMANTIC_MODEL or the repo model)
+        cache_path: Pickle cache location (default: HEALTH_CATALOG_CACHE or
+            ~/.cache/health-mcp; "" disables caching)
+    
+    Returns:
+        Compiled SemanticCatalog
+    """
+    model_path = Path(model_path or os.getenv("HEALTH_SEMANTIC_MODEL") or DEFAULT_MODEL_PATH)
+    if cache_path is None:
+        cache_path = os.getenv("HEALTH_CATALOG_CACHE", str(DEFAULT_CACHE_PATH))
+    cache_path = Path(cache_path) if cache_path else None  # "" disables the cache
+    
+    stat = model_path.stat()
+    cache_key = (CATALOG_FORMAT, str(model_path.resolve()), stat.st_size, stat.st_mtime_ns)
+    
+    if cache_path is not None and cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                cached_key, catalog = pickle.load(f)
+            if cached_key == cache_key:
+                return catalog
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable catalog cache {cache_path}: {e}", file=sys.stderr)
+    
+    import yaml  # Only needed when the cache is missing or stale
+    
+    with open(model_path, "r", encoding="utf-8") as f:
+        catalog = SemanticCatalog.from_model(yaml.safe_load(f))
+    
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(f"{cache_path}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump((cache_key, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"WARNING: Could not write catalog cache {cache_path}: {e}", file=sys.stderr)
+    
+    return catalog
+
+
+_catalog: Optional[SemanticCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> SemanticCatalog:
+    """Process-wide catalog, loaded on first use (call at server start to warm it)"""
+    global _catalog
+    
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = load_catalog()
+    
+    return _catalog
@@ -3,12 +3,16 @@ Semantic Query Executor
 Executes natural language queries and returns human-readable results
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import base64
 import json
-from datetime import datetime
+import sys
+from datetime import date, datetime, timedelta
 
+import trend_stats
 from snowflake_client import SnowflakeClient
 from nl_mapper import nl_to_sql, QueryIntent, NLMapper
+from trend_cache import TrendCache
 
 
 class HealthInsight:
@@ -47,23 +51,151 @@ class HealthInsight:
 class SemanticQueryExecutor:
     """Executes semantic (natural language) queries against health data"""
     
-    def __init__(self, snowflake_client: SnowflakeClient):
+    # Records per page (each rendered as an insight) for list queries
+    MAX_LIST_INSIGHTS = 10
+    
+    # SQL equivalent of _append_trend_point's value extraction: the first of
+    # value/result_value/result/amount whose leading token is numeric
+    TREND_VALUE_SQL = """COALESCE(
+                    TRY_CAST(SPLIT_PART(data_variant:value::STRING, ' ', 1) AS FLOAT),
+                    TRY_CAST(SPLIT_PART(data_variant:result_value::STRING, ' ', 1) AS FLOAT),
+                    TRY_CAST(SPLIT_PART(data_variant:result::STRING, ' ', 1) AS FLOAT),
+                    TRY_CAST(SPLIT_PART(data_variant:amount::STRING, ' ', 1) AS FLOAT)
+                )"""
+    
+    # Trend attribute match on the search-optimized test/vital paths
+    # (bound to the same ILIKE pattern twice)
+    TREND_ATTRIBUTE_SQL = (
+        "(data_variant:test_name::STRING ILIKE ? OR data_variant:vital_type::STRING ILIKE ?)"
+    )
+    
+    # Trend points per page when get_trend is paged without a page_size
+    TREND_PAGE_SIZE = 500
+    
+    # Smallest max_points get_trend downsamples to: LTTB always keeps the
+    # first and last points plus at least one bucket in between
+    TREND_MIN_POINTS = 3
+    
+    # Trend points for the watermark cache; {since_sql} limits a refresh to
+    # records created after the series' watermark
+    TREND_POINTS_SQL = """
+        SELECT 
+            record_id,
+            record_date,
+            created_date,
+            {value_sql} AS trend_value
+        FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+        WHERE patient_id = ?
+        AND {attribute_sql}
+        AND record_date >= DATEADD(day, -?, CURRENT_DATE())
+        {since_sql}
+        AND trend_value IS NOT NULL
+    """
+    
+    # Trend summary computed in Snowflake: one row per date bucket (averaged
+    # points), each carrying the whole-window statistics. The LEFT JOIN keeps
+    # the statistics row when there are no points or no buckets are requested.
+    TREND_SUMMARY_SQL = """
+        WITH points AS (
+            SELECT 
+                record_date,
+                {value_sql} AS trend_value
+            FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+            WHERE patient_id = ?
+            AND {attribute_sql}
+            AND record_date >= DATEADD(day, -?, CURRENT_DATE())
+            AND trend_value IS NOT NULL
+        ),
+        summary AS (
+            SELECT 
+                COUNT(*) AS point_count,
+                AVG(trend_value) AS value_average,
+                MIN(trend_value) AS value_minimum,
+                MAX(trend_value) AS value_maximum,
+                STDDEV(trend_value) AS value_stddev,
+                PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY trend_value) AS value_p25,
+                PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY trend_value) AS value_median,
+                PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY trend_value) AS value_p75,
+                REGR_SLOPE(trend_value, DATEDIFF(day, '1970-01-01'::DATE, record_date)) AS slope_per_day,
+                MIN(record_date) AS first_date,
+                MAX(record_date) AS last_date
+            FROM points
+        ),
+        buckets AS (
+            SELECT 
+                WIDTH_BUCKET(
+                    DATEDIFF(day, s.first_date, p.record_date),
+                    0, DATEDIFF(day, s.first_date, s.last_date) + 1, GREATEST(?, 1)
+                ) AS bucket,
+                MIN(p.record_date) AS bucket_start,
+                COUNT(*) AS bucket_count,
+                AVG(p.trend_value) AS bucket_average,
+                MIN(p.trend_value) AS bucket_minimum,
+                MAX(p.trend_value) AS bucket_maximum
+            FROM points p CROSS JOIN summary s
+            WHERE ? > 0
+            GROUP BY bucket
+        )
+        SELECT s.*, b.bucket_start, b.bucket_count, b.bucket_average, b.bucket_minimum, b.bucket_maximum
+        FROM summary s LEFT JOIN buckets b ON TRUE
+        ORDER BY b.bucket
+    """
+    
+    # One UNION ALL branch of a fused aggregate query (see query_many)
+    FUSED_AGGREGATE_BRANCH_SQL = "SELECT {position} AS query_index, OBJECT_CONSTRUCT(*) AS result_row FROM (\n{query}\n)"
+    
+    def __init__(
+        self,
+        snowflake_client: SnowflakeClient,
+        trend_cache: Optional[TrendCache] = None,
+        intent_cache_size: int = 1024,
+        sql_template_cache_size: int = 1024,
+    ):
         """
         Initialize executor
         
+        The executor is safe to share between threads; keep one for the
+        life of the process so its caches stay warm across requests.
+        
         Args:
             snowflake_client: Connected Snowflake client
+            trend_cache: Series cache for get_trend without raw data; when
+                given, repeat trends only fetch records created since the
+                last call, and a patient's series are dropped when an import
+                for them commits (share one across executors to benefit)
+            intent_cache_size: Parsed questions memoized by the mapper
+            sql_template_cache_size: Compiled SQL templates memoized by the
+                mapper, keyed by intent shape and page
         """
         self.client = snowflake_client
-        self.mapper = NLMapper()
+        self.mapper = NLMapper(
+            intent_cache_size=intent_cache_size,
+            template_cache_size=sql_template_cache_size,
+        )
+        self.trend_cache = trend_cache
+        if trend_cache is not None:
+            # Imports can commit rows behind a series' watermark, so drop
+            # the patient's series whenever an import for them commits
+            snowflake_client.add_invalidation_listener(trend_cache.invalidate_patient)
     
-    def query(self, patient_identity: str, natural_language_query: str) -> Dict[str, Any]:
+    def query(
+        self,
+        patient_identity: str,
+        natural_language_query: str,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Execute a natural language health query
         
+        List questions return one page of records; pass the response's
+        next_cursor back (with the same question) to get the next page.
+        
         Args:
             patient_identity: Patient name or identifier
             natural_language_query: Natural language question
+            cursor: next_cursor from a previous page of this question
+            page_size: Records per page (default MAX_LIST_INSIGHTS)
             
         Returns:
             Dictionary with query results and interpretation
@@ -77,32 +209,171 @@ class SemanticQueryExecutor:
                 "query": natural_language_query,
             }
         
-        # Parse intent
-        intent = self.mapper.parse_intent(natural_language_query)
+        try:
+            offset = self._decode_cursor(cursor)
+        except ValueError as e:
+            return {"success": False, "error": str(e), "query": natural_language_query}
+        page_size = page_size or self.MAX_LIST_INSIGHTS
         
-        # Convert to SQL
-        sql = self.mapper.intent_to_sql(intent, patient_id)
+        # Parse intent and convert to a SQL template and its bind parameters
+        intent, sql, params = self._prepare(natural_language_query, patient_id, page_size, offset)
         
-        # Execute query
+        # Execute query - list queries fetch only the requested page, with
+        # the total match count computed in the same statement
         try:
-            results = self.client.execute_query(sql)
+            results = self.client.cached_query(patient_id, sql, params)
+            total_count = len(results) if self._is_aggregate(intent) else self._page_total(results, offset)
             # Debug: Log the SQL and result count
-            if __name__ == "__main__" or len(results) == 0:
+            if __name__ == "__main__" or total_count == 0:
                 print(f"[DEBUG] SQL: {sql[:200]}...")
-                print(f"[DEBUG] Results count: {len(results)}")
+                print(f"[DEBUG] Results count: {total_count}")
         except Exception as e:
+            return self._query_error(natural_language_query, sql, e)
+        
+        return self._query_result(natural_language_query, intent, sql, results, total_count, offset)
+    
+    def query_many(self, patient_identity: str, questions: List[str]) -> Dict[str, Any]:
+        """
+        Execute several natural language queries about one patient
+        
+        The patient is looked up once. Aggregate questions (counts,
+        averages, ...) each return a single row, so the uncached ones are
+        fused into one UNION ALL statement and answered in a single round
+        trip; list questions each fetch their first page.
+        
+        Args:
+            patient_identity: Patient name or identifier
+            questions: Natural language questions
+            
+        Returns:
+            Dictionary with one query() style result per question, in order
+        """
+        patient_id = self.client.get_patient_id(patient_identity)
+        if patient_id is None:
             return {
                 "success": False,
-                "error": f"Query execution failed: {str(e)}",
-                "query": natural_language_query,
-                "sql": sql,
+                "error": f"Patient not found: {patient_identity}",
+                "questions": questions,
             }
         
-        # Interpret results
-        insights = self._interpret_results(intent, results)
+        prepared = [self._prepare(question, patient_id, self.MAX_LIST_INSIGHTS) for question in questions]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
         
-        # For the query() method, return the first insight directly
-        result_dict = {
+        aggregates = [index for index, (intent, _, _) in enumerate(prepared) if self._is_aggregate(intent)]
+        if aggregates:
+            queries = [prepared[index][1:] for index in aggregates]
+            try:
+                rows = self.client.cached_results(
+                    patient_id, queries, lambda misses: self._fetch_fused_aggregates([queries[i] for i in misses])
+                )
+            except Exception as e:
+                print(f"WARNING: Fused aggregate query failed, running questions separately: {e}", file=sys.stderr)
+                rows = None
+            
+            for position, index in enumerate(aggregates):
+                intent, sql, params = prepared[index]
+                try:
+                    row_set = rows[position] if rows is not None else self.client.cached_query(patient_id, sql, params)
+                except Exception as e:
+                    results[index] = self._query_error(questions[index], sql, e)
+                    continue
+                results[index] = self._query_result(questions[index], intent, sql, row_set, len(row_set))
+        
+        for index, (intent, sql, params) in enumerate(prepared):
+            if results[index] is not None:
+                continue
+            try:
+                page = self.client.cached_query(patient_id, sql, params)
+            except Exception as e:
+                results[index] = self._query_error(questions[index], sql, e)
+                continue
+            results[index] = self._query_result(questions[index], intent, sql, page, self._page_total(page, 0))
+        
+        return {
+            "success": True,
+            "patient_identity": patient_identity,
+            "results": results,
+            "succeeded": sum(1 for result in results if result["success"]),
+        }
+    
+    def _prepare(
+        self,
+        natural_language_query: str,
+        patient_id: int,
+        page_size: int,
+        offset: int = 0,
+    ) -> Tuple[QueryIntent, str, List]:
+        """Parse a question and build its SQL template and bind parameters"""
+        intent = self.mapper.parse_intent(natural_language_query)
+        sql, params = self.mapper.intent_to_sql(intent, patient_id, limit=page_size, offset=offset)
+        return intent, sql, params
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Statistics of every cache behind this executor
+        
+        Returns:
+            Dictionary of cache name -> TTLCache.stats() style counters
+        """
+        stats = {
+            "patient_ids": self.client.patient_cache_stats(),
+            "query_results": self.client.result_cache_stats(),
+            **self.mapper.cache_stats(),
+            "catalog": {"phrases": len(self.mapper.catalog.matcher)},
+        }
+        if self.trend_cache is not None:
+            stats["trend_series"] = self.trend_cache.stats()
+        return stats
+    
+    def _is_aggregate(self, intent: QueryIntent) -> bool:
+        """Aggregate metrics return a single summary row"""
+        return intent.metric in self.mapper.catalog.metric_functions
+    
+    def _fetch_fused_aggregates(self, queries: List[Tuple[str, List]]) -> List[List[Dict]]:
+        """
+        Run single-row aggregate queries as one UNION ALL statement
+        
+        Each branch tags its row with the query's position and packs the
+        row into an OBJECT, so branches with different columns line up.
+        
+        Returns:
+            The result rows of each query, in order
+        """
+        if len(queries) == 1:
+            sql, params = queries[0]
+            return [self.client.execute_query(sql, params)]
+        
+        branches = []
+        params: List = []
+        for position, (sql, query_params) in enumerate(queries):
+            branches.append(self.FUSED_AGGREGATE_BRANCH_SQL.format(position=position, query=sql))
+            params.extend(query_params)
+        
+        results: List[List[Dict]] = [[] for _ in queries]
+        for row in self.client.execute_query("\nUNION ALL\n".join(branches), params):
+            packed = row.get("RESULT_ROW")
+            if isinstance(packed, str):
+                packed = json.loads(packed)
+            results[int(row["QUERY_INDEX"])].append(packed or {})
+        return results
+    
+    def _query_result(
+        self,
+        natural_language_query: str,
+        intent: QueryIntent,
+        sql: str,
+        results: List[Dict],
+        total_count: int,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """query() response for executed results"""
+        insights = self._interpret_results(intent, results, total_count, offset)
+        
+        next_cursor = None
+        if not self._is_aggregate(intent) and offset + len(results) < total_count:
+            next_cursor = self._encode_cursor(offset + len(results))
+        
+        return {
             "success": True,
             "query": natural_language_query,
             "intent": {
@@ -115,27 +386,69 @@ class SemanticQueryExecutor:
             "sql": sql,
             "raw_results": results,
             "insights": [insight.to_dict() for insight in insights],
-            "record_count": len(results),
+            "record_count": total_count,
+            "next_cursor": next_cursor,
         }
-        
-        # Return first insight if available, otherwise return the full result
-        if insights:
-            return insights[0].to_dict()
-        else:
-            return {"title": "No Results", "value": "No data available"}
     
-    def _interpret_results(self, intent: QueryIntent, results: List[Dict]) -> List[HealthInsight]:
+    @staticmethod
+    def _page_total(page: List[Dict], offset: int) -> int:
+        """Total matches of a list query, from the page's total_count column"""
+        if page:
+            return int(page[0].get("TOTAL_COUNT", offset + len(page)))
+        return offset
+    
+    @staticmethod
+    def _encode_cursor(offset: int) -> str:
+        """Opaque continuation token for the page starting at offset"""
+        return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode()
+    
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> int:
+        """Offset encoded in a cursor (0 for the first page)"""
+        if not cursor:
+            return 0
+        try:
+            offset = int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["offset"])
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if offset < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return offset
+    
+    @staticmethod
+    def _query_error(natural_language_query: str, sql: str, error: Exception) -> Dict[str, Any]:
+        """query() response for a failed execution"""
+        return {
+            "success": False,
+            "error": f"Query execution failed: {str(error)}",
+            "query": natural_language_query,
+            "sql": sql,
+        }
+    
+    def _interpret_results(
+        self,
+        intent: QueryIntent,
+        results: List[Dict],
+        total_count: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[HealthInsight]:
         """
         Interpret query results and generate human-readable insights
         
         Args:
             intent: Parsed query intent
-            results: Raw query results from database
+            results: Raw query results from database (for list queries, the
+                page of rows to render)
+            total_count: Total matching rows for list queries, if more were
+                matched than passed in results
+            offset: Position of results[0] among all matching rows
             
         Returns:
             List of HealthInsight objects
         """
         insights = []
+        if total_count is None:
+            total_count = len(results)
         
         if not results:
             insight = HealthInsight(
@@ -221,7 +534,7 @@ class SemanticQueryExecutor:
         
         # Handle list results
         else:
-            for i, result in enumerate(results[:10]):  # Show top 10 results
+            for i, result in enumerate(results):
                 record_date = result.get("RECORD_DATE", "Unknown date")
                 data_json = result.get("DATA_JSON", "{}")
                 provider = result.get("PROVIDER_IDENTITY", "Unknown provider")
@@ -247,45 +560,52 @@ class SemanticQueryExecutor:
                 )
                 insights.append(insight)
             
+            # Flag values far outside the rest of the page (Tukey fences)
+            if intent.attribute:
+                self._flag_outliers(insights)
+            
             # If there are more results, indicate that
-            if len(results) > 10:
+            remaining = total_count - offset - len(results)
+            if remaining > 0:
                 insight = HealthInsight(
                     title="Additional Records",
-                    value=f"Plus {len(results) - 10} more records not shown",
-                    record_count=len(results) - 10,
+                    value=f"Plus {remaining} more records not shown",
+                    record_count=remaining,
                 )
                 insights.append(insight)
         
         return insights
     
+    def _flag_outliers(self, insights: List[HealthInsight]):
+        """Note unusual values in the interpretations of a page of record insights"""
+        values = [self._numeric_value(insight.value) for insight in insights]
+        numbered = [(insight, value) for insight, value in zip(insights, values) if value is not None]
+        if len(numbered) < 4:
+            return
+        
+        mask = trend_stats.outlier_mask([value for _, value in numbered])
+        for (insight, _), unusual in zip(numbered, mask):
+            if unusual:
+                insight.interpretation += " - unusual value compared to the other results"
+    
     def _guess_unit(self, attribute: Optional[str]) -> Optional[str]:
-        """Guess appropriate unit for an attribute"""
+        """Display unit for an attribute, from the semantic catalog"""
         if not attribute:
             return None
         
-        units = {
-            "glucose": "mg/dL",
-            "bp": "mmHg",
-            "blood pressure": "mmHg",
-            "heart rate": "bpm",
-            "temperature": "°F",
-            "cholesterol": "mg/dL",
-            "ldl": "mg/dL",
-            "hdl": "mg/dL",
-            "triglycerides": "mg/dL",
-            "a1c": "%",
-            "hemoglobin": "g/dL",
-            "creatinine": "mg/dL",
-            "bun": "mg/dL",
-        }
-        
-        return units.get(attribute.lower())
+        return self.mapper.catalog.units.get(attribute.lower())
     
     def get_trend(
         self,
         patient_identity: str,
         attribute: str,
         days: int = 90,
+        include_raw_data: bool = True,
+        summarize_in_sql: bool = False,
+        buckets: int = 100,
+        max_points: Optional[int] = None,
+        cursor: Optional[str] = None,
+        page_size: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Get trend data for a specific health metric
@@ -294,14 +614,51 @@ class SemanticQueryExecutor:
             patient_identity: Patient identifier
             attribute: Health metric to analyze (glucose, blood pressure, etc.)
             days: Number of days to look back
+            include_raw_data: Attach each point's parsed data_json. When False,
+                values are extracted in SQL and fetched as Arrow columns (or
+                merged into the trend cache, if the executor has one), so no
+                per-row JSON parsing happens in Python.
+            summarize_in_sql: Compute the statistics (including regression
+                slope and percentiles) in Snowflake and return only them plus
+                the points averaged into date buckets; include_raw_data is
+                ignored.
+            buckets: Maximum points returned by summarize_in_sql (0 = statistics only)
+            max_points: Downsample data_points to at most this many with
+                Largest-Triangle-Three-Buckets, which keeps peaks and dips
+                (raised to TREND_MIN_POINTS if smaller)
+            cursor: next_cursor from a previous page of this trend
+            page_size: Return the full series a page at a time instead
+                (default TREND_PAGE_SIZE when only cursor is given)
             
         Returns:
             Dictionary with trend information
         """
+        try:
+            offset = self._decode_cursor(cursor)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        
         patient_id = self.client.get_patient_id(patient_identity)
         if patient_id is None:
             return {"success": False, "error": f"Patient not found: {patient_identity}"}
         
+        if summarize_in_sql:
+            return self._get_trend_summary(patient_id, attribute, days, buckets)
+        if not include_raw_data and self.trend_cache is not None:
+            result = self._get_trend_incremental(patient_id, attribute, days)
+        elif not include_raw_data:
+            result = self._get_trend_columnar(patient_id, attribute, days)
+        else:
+            result = self._get_trend_rows(patient_id, attribute, days)
+        
+        if cursor or page_size:
+            return self._page_trend_points(result, offset, page_size or self.TREND_PAGE_SIZE)
+        if max_points:
+            return self._downsample_trend_points(result, max_points)
+        return result
+    
+    def _get_trend_rows(self, patient_id: int, attribute: str, days: int) -> Dict[str, Any]:
+        """get_trend with each point's parsed data_json attached"""
         # Build query for trend data
         sql = f"""
             SELECT 
@@ -309,78 +666,250 @@ class SemanticQueryExecutor:
                 data_json,
                 extraction_confidence
             FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
-            WHERE patient_id = {patient_id}
-            AND data_json LIKE '%{attribute}%'
-            AND record_date >= DATEADD(day, -{days}, CURRENT_DATE())
-            ORDER BY record_date ASC
+            WHERE patient_id = ?
+            AND {self.TREND_ATTRIBUTE_SQL}
+            AND record_date >= DATEADD(day, -?, CURRENT_DATE())
+            ORDER BY record_date ASC, record_id ASC
         """
+        params = self._trend_params(patient_id, attribute, days)
         
+        # Stream rows and keep only the extracted points
+        trend_points = []
+        row_count = 0
         try:
-            results = self.client.execute_query(sql)
+            for result in self.client.iter_query(sql, params):
+                row_count += 1
+                self._append_trend_point(trend_points, result)
         except Exception as e:
             return {"success": False, "error": f"Query failed: {str(e)}"}
         
-        if not results:
+        if row_count == 0:
             return {"success": True, "trend_data": [], "message": f"No data found for {attribute}"}
         
-        # Extract values from results
-        trend_points = []
-        for result in results:
-            date = result.get("RECORD_DATE")
-            data = result.get("DATA_JSON")
-            
-            try:
-                if isinstance(data, str):
-                    data_obj = json.loads(data)
-                else:
-                    data_obj = data
-                
-                # Try to extract numeric value
-                value = None
-                if isinstance(data_obj, dict):
-                    # Look for common value fields
-                    for key in ["value", "result_value", "result", "amount"]:
-                        if key in data_obj:
-                            try:
-                                value = float(str(data_obj[key]).split()[0])
-                                break
-                            except:
-                                pass
-                
-                if value is not None:
-                    trend_points.append({
-                        "date": str(date),
-                        "value": value,
-                        "raw_data": data_obj,
-                    })
-            except:
-                pass
-        
         # Calculate trend statistics
         if trend_points:
-            values = [p["value"] for p in trend_points]
-            avg = sum(values) / len(values)
-            trend = "stable"
-            
-            if len(values) >= 2:
-                slope = (values[-1] - values[0]) / len(values)
-                if slope > 1:
-                    trend = "increasing"
-                elif slope < -1:
-                    trend = "decreasing"
-            
             return {
                 "success": True,
                 "attribute": attribute,
                 "days": days,
                 "data_points": trend_points,
-                "statistics": {
-                    "count": len(values),
-                    "average": round(avg, 2),
-                    "minimum": min(values),
-                    "maximum": max(values),
-                    "trend": trend,
-                },
+                "statistics": trend_stats.summarize(
+                    [p["value"] for p in trend_points], [p["date"] for p in trend_points]
+                ),
             }
         
         return {"success": True, "trend_data": [], "message": "Could not extract numeric values"}
+    
+    def _get_trend_columnar(self, patient_id: int, attribute: str, days: int) -> Dict[str, Any]:
+        """get_trend over Arrow columns with values extracted in Snowflake"""
+        sql = f"""
+            SELECT 
+                record_date,
+                {self.TREND_VALUE_SQL} AS trend_value
+            FROM HEALTH_INTELLIGENCE.HEALTH_RECORDS.HEALTH_RECORDS
+            WHERE patient_id = ?
+            AND {self.TREND_ATTRIBUTE_SQL}
+            AND record_date >= DATEADD(day, -?, CURRENT_DATE())
+            AND trend_value IS NOT NULL
+            ORDER BY record_date ASC, record_id ASC
+        """
+        
+        try:
+            columns = self.client.fetch_columns(sql, self._trend_params(patient_id, attribute, days))
+        except Exception as e:
+            return {"success": False, "error": f"Query failed: {str(e)}"}
+        
+        dates = columns.get("RECORD_DATE", [])
+        values = columns.get("TREND_VALUE", [])
+        if len(values) == 0:
+            return {"success": True, "trend_data": [], "message": f"No numeric data found for {attribute}"}
+        
+        return {
+            "success": True,
+            "attribute": attribute,
+            "days": days,
+            "data_points": [
+                {"date": str(date), "value": float(value)}
+                for date, value in zip(dates, values)
+            ],
+            "statistics": trend_stats.summarize(values, dates),
+        }
+    
+    def _page_trend_points(self, result: Dict[str, Any], offset: int, page_size: int) -> Dict[str, Any]:
+        """Return one page of a trend's points (statistics still cover the whole series)"""
+        points = result.get("data_points")
+        if points is None:
+            return result
+        
+        end = offset + int(page_size)
+        result["total_points"] = len(points)
+        result["data_points"] = points[offset:end]
+        result["next_cursor"] = self._encode_cursor(end) if end < len(points) else None
+        return result
+    
+    @classmethod
+    def _downsample_trend_points(cls, result: Dict[str, Any], max_points: int) -> Dict[str, Any]:
+        """Reduce a trend's points to max_points with LTTB, keeping its visual shape"""
+        points = result.get("data_points")
+        if points is None:
+            return result
+        
+        max_points = max(int(max_points), cls.TREND_MIN_POINTS)
+        result["total_points"] = len(points)
+        result["downsampled"] = len(points) > max_points
+        if result["downsampled"]:
+            keep = trend_stats.lttb(
+                [point["date"] for point in points],
+                [point["value"] for point in points],
+                max_points,
+            )
+            result["data_points"] = [points[index] for index in keep]
+        return result
+    
+    def _get_trend_incremental(self, patient_id: int, attribute: str, days: int) -> Dict[str, Any]:
+        """get_trend from the trend cache, fetching only records newer than its watermark"""
+        series = self.trend_cache.series(patient_id, attribute, days)
+        
+        with series.lock:
+            since = self.trend_cache.fetch_since(series)
+            sql = self.TREND_POINTS_SQL.format(
+                value_sql=self.TREND_VALUE_SQL,
+                attribute_sql=self.TREND_ATTRIBUTE_SQL,
+                since_sql="AND created_date >= ?" if since is not None else "",
+            )
+            params = self._trend_params(patient_id, attribute, days)
+            if since is not None:
+                params.append(since)
+            
+            # Fetch every row before merging: rows arrive in no particular
+            # created_date order, so merging a partial fetch would advance
+            # the watermark past rows that were never read
+            try:
+                fetched = [
+                    (row["RECORD_ID"], row["RECORD_DATE"], float(row["TREND_VALUE"]), row.get("CREATED_DATE"))
+                    for row in self.client.iter_query(sql, params)
+                ]
+            except Exception as e:
+                return {"success": False, "error": f"Query failed: {str(e)}"}
+            
+            for record_id, record_date, value, created_date in fetched:
+                series.merge(record_id, record_date, value, created_date)
+            
+            # Slide the window forward
+            series.evict_before(date.today() - timedelta(days=int(days)))
+            
+            if not len(series):
+                return {"success": True, "trend_data": [], "message": f"No numeric data found for {attribute}"}
+            
+            return {
+                "success": True,
+                "attribute": attribute,
+                "days": days,
+                "data_points": [
+                    {"date": str(point_date), "value": value}
+                    for point_date, value in zip(series.dates, series.values)
+                ],
+                "statistics": series.statistics(),
+            }
+    
+    def _get_trend_summary(self, patient_id: int, attribute: str, days: int, buckets: int) -> Dict[str, Any]:
+        """get_trend with extraction, statistics and downsampling done in Snowflake"""
+        sql = self.TREND_SUMMARY_SQL.format(value_sql=self.TREND_VALUE_SQL, attribute_sql=self.TREND_ATTRIBUTE_SQL)
+        buckets = max(0, int(buckets))
+        params = self._trend_params(patient_id, attribute, days) + [buckets, buckets]
+        
+        try:
+            rows = self.client.cached_query(patient_id, sql, params)
+        except Exception as e:
+            return {"success": False, "error": f"Query failed: {str(e)}"}
+        
+        summary = rows[0] if rows else {}
+        count = int(summary.get("POINT_COUNT") or 0)
+        if count == 0:
+            return {"success": True, "trend_data": [], "message": f"No numeric data found for {attribute}"}
+        
+        def number(key: str) -> Optional[float]:
+            value = summary.get(key)
+            return None if value is None else float(value)
+        
+        average = number("VALUE_AVERAGE")
+        stddev = number("VALUE_STDDEV")
+        slope = number("SLOPE_PER_DAY")
+        span_days = (summary["LAST_DATE"] - summary["FIRST_DATE"]).days
+        
+        data_points = [
+            {
+                "date": str(row["BUCKET_START"]),
+                "value": round(float(row["BUCKET_AVERAGE"]), 2),
+                "count": int(row["BUCKET_COUNT"]),
+                "minimum": float(row["BUCKET_MINIMUM"]),
+                "maximum": float(row["BUCKET_MAXIMUM"]),
+            }
+            for row in rows
+            if row.get("BUCKET_START") is not None
+        ]
+        
+        return {
+            "success": True,
+            "attribute": attribute,
+            "days": days,
+            "data_points": data_points,
+            "downsampled": len(data_points) < count,
+            "statistics": {
+                "count": count,
+                "average": round(average, 2),
+                "minimum": number("VALUE_MINIMUM"),
+                "maximum": number("VALUE_MAXIMUM"),
+                "stddev": None if stddev is None else round(stddev, 2),
+                "p25": number("VALUE_P25"),
+                "median": number("VALUE_MEDIAN"),
+                "p75": number("VALUE_P75"),
+                "slope_per_day": slope,
+                "first_date": str(summary["FIRST_DATE"]),
+                "last_date": str(summary["LAST_DATE"]),
+                "trend": trend_stats.trend_direction(slope, span_days, average),
+            },
+        }
+    
+    @staticmethod
+    def _trend_params(patient_id: int, attribute: str, days: int) -> List:
+        """Bind parameters for the trend queries, in placeholder order"""
+        pattern = f"%{attribute}%"
+        return [patient_id, pattern, pattern, int(days)]
+    
+    @staticmethod
+    def _numeric_value(data_obj: Any) -> Optional[float]:
+        """Numeric value of a parsed record, from the first common value field that has one"""
+        if not isinstance(data_obj, dict):
+            return None
+        
+        # Look for common value fields
+        for key in ["value", "result_value", "result", "amount"]:
+            if key in data_obj:
+                try:
+                    return float(str(data_obj[key]).split()[0])
+                except (ValueError, IndexError):
+                    pass
+        return None
+    
+    @staticmethod
+    def _append_trend_point(trend_points: List[Dict], result: Dict):
+        """Extract a numeric trend point from a result row, if it has one"""
+        date = result.get("RECORD_DATE")
+        data = result.get("DATA_JSON")
+        
+        try:
+            if isinstance(data, str):
+                data_obj = json.loads(data)
+            else:
+                data_obj = data
+            
+            value = SemanticQueryExecutor._numeric_value(data_obj)
+            if value is not None:
+                trend_points.append({
+                    "date": str(date),
+                    "value": value,
+                    "raw_data": data_obj,
+                })
+        except:
+            pass
@@ -3,20 +3,178 @@ Snowflake Client
 Wrapper for Snowflake connections and operations
 """
 
+import gzip
 import json
-from typing import List, Dict, Any, Optional
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from datetime import datetime, date
 from decimal import Decimal
+from pathlib import Path
 
+import numpy as np
 from snowflake.connector import connect, ProgrammingError, DatabaseError
 from pydantic import BaseModel
 
 from health_models import HealthRecord, RecordClass
+from semantic_catalog import get_catalog
+from ttl_cache import TTLCache
 
 
 class SnowflakeClient:
     """Manages Snowflake connections and health data operations"""
     
+    # Records sent per multi-row INSERT round trip when importing
+    DEFAULT_INSERT_BATCH_SIZE = 1000
+    
+    # Imports at least this large are bulk loaded through the RAW_DATA stage
+    DEFAULT_STAGE_LOAD_THRESHOLD = 50000
+    
+    # Maximum NDJSON lines per staged file (Snowflake loads files in parallel)
+    DEFAULT_STAGE_FILE_ROWS = 100000
+    
+    # Rows pulled per fetchmany() call when streaming results
+    DEFAULT_FETCH_BATCH_SIZE = 1000
+    
+    # Patient identities upserted per MERGE statement
+    PATIENT_MERGE_CHUNK_SIZE = 5000
+    
+    # Import ids prefetched from the sequence per round trip
+    DEFAULT_IMPORT_ID_BLOCK_SIZE = 20
+    
+    # Patients imported concurrently by import_health_records_batch
+    DEFAULT_IMPORT_PARALLELISM = 4
+    
+    # Bind style for every statement (SQL here uses ? placeholders)
+    PARAMSTYLE = "qmark"
+    
+    # Operations that may safely run at once (one connection -> one)
+    max_concurrency = 1
+    
+    _CACHE_MISS = object()
+    
+    # Multi-row insert ({rows} = one HEALTH_RECORD_VALUES_ROW per record).
+    # Written as INSERT ... SELECT so data_variant can be parsed on the way
+    # in; Snowflake rejects function calls inside a plain VALUES list, which
+    # also rules out executemany() array binding for this statement.
+    INSERT_HEALTH_RECORD_SQL = """
+        INSERT INTO HEALTH_RECORDS (
+            patient_id, import_id, record_class, 
+            record_date, provider_identity, data_json, data_variant,
+            extraction_confidence, verification_status
+        )
+        SELECT
+            column1, column2, column3,
+            column4, column5, column6, TRY_PARSE_JSON(column6),
+            column7, column8
+        FROM VALUES {rows}
+    """
+    
+    HEALTH_RECORD_VALUES_ROW = "(?, ?, ?, ?, ?, ?, ?, ?)"
+    
+    # Spellings of each vital sign folded into VITAL_READINGS.vital_key
+    VITAL_CLASS_ALIASES = {
+        "bp": ["bp", "blood pressure", "blood_pressure"],
+        "hr": ["hr", "heart rate", "heart_rate", "pulse"],
+        "temp": ["temp", "temperature", "body temperature"],
+        "rr": ["rr", "resp rate", "respiratory rate", "respiratory_rate"],
+        "o2sat": ["o2sat", "o2 sat", "spo2", "oxygen saturation", "o2"],
+        "weight": ["weight", "wt"],
+        "height": ["height", "ht"],
+        "bmi": ["bmi"],
+    }
+    
+    # Typed projections of LAB / VITAL rows, written once at import time so
+    # analytic queries read native numbers instead of parsing data_json.
+    # {scope} selects the HEALTH_RECORDS rows to project.
+    LAB_PROJECTION_SQL = """
+        INSERT INTO LAB_RESULTS (
+            record_id, patient_id, import_id, record_date,
+            test_identity, test_key, result_numeric, result_units, abnormal_flag
+        )
+        SELECT
+            record_id, patient_id, import_id, record_date,
+            doc:test_name::STRING,
+            LOWER(TRIM(doc:test_name::STRING)),
+            TRY_TO_DOUBLE(REPLACE(REGEXP_SUBSTR(doc:result_value::STRING, '-?[0-9][0-9,]*([.][0-9]+)?'), ',', '')),
+            NULLIF(TRIM(REGEXP_REPLACE(doc:result_value::STRING, '^[^A-Za-z]*', '')), ''),
+            NULLIF(UPPER(TRIM(doc:abnormal_flag::STRING)), '')
+        FROM (
+            SELECT record_id, patient_id, import_id, record_date,
+                COALESCE(data_variant, TRY_PARSE_JSON(data_json)) AS doc
+            FROM HEALTH_RECORDS
+            WHERE record_class = 'LAB' AND {scope}
+        )
+    """
+    
+    VITAL_PROJECTION_SQL = """
+        INSERT INTO VITAL_READINGS (
+            record_id, patient_id, import_id, record_date,
+            vital_class, vital_key, value_numeric, value_secondary, value_units
+        )
+        SELECT
+            record_id, patient_id, import_id, record_date,
+            doc:vital_type::STRING,
+            {vital_key},
+            TRY_TO_DOUBLE(REPLACE(REGEXP_SUBSTR(doc:value::STRING, '-?[0-9][0-9,]*([.][0-9]+)?'), ',', '')),
+            TRY_TO_DOUBLE(REGEXP_SUBSTR(doc:value::STRING, '/ *([0-9]+([.][0-9]+)?)', 1, 1, 'e', 1)),
+            NULLIF(TRIM(REGEXP_REPLACE(doc:value::STRING, '^[^A-Za-z]*', '')), '')
+        FROM (
+            SELECT record_id, patient_id, import_id, record_date,
+                COALESCE(data_variant, TRY_PARSE_JSON(data_json)) AS doc
+            FROM HEALTH_RECORDS
+            WHERE record_class = 'VITAL' AND {scope}
+        )
+    """
+    
+    # Rollup tables and the DATE expression bucketing record_date into them
+    ROLLUP_BUCKETS = {
+        "MEASUREMENT_DAILY": "record_date",
+        "MEASUREMENT_MONTHLY": "DATE_TRUNC('month', record_date)",
+    }
+    
+    # Fold one import's measurements into the rollup buckets they fall in.
+    # Imports only add rows, so counts and sums add up and min/max widen.
+    ROLLUP_MERGE_SQL = """
+        MERGE INTO {table} t
+        USING (
+            SELECT
+                patient_id, measure_class, measure_key, {bucket} AS bucket_date,
+                COUNT(*) AS record_count,
+                COUNT(value_numeric) AS value_count,
+                SUM(value_numeric) AS value_sum,
+                MIN(value_numeric) AS value_min,
+                MAX(value_numeric) AS value_max
+            FROM MEASUREMENTS
+            WHERE import_id = ?
+            GROUP BY patient_id, measure_class, measure_key, bucket_date
+        ) s
+        ON t.patient_id = s.patient_id
+            AND t.measure_class = s.measure_class
+            AND t.measure_key = s.measure_key
+            AND t.bucket_date = s.bucket_date
+        WHEN MATCHED THEN UPDATE SET
+            record_count = t.record_count + s.record_count,
+            value_count = t.value_count + s.value_count,
+            value_sum = COALESCE(t.value_sum + s.value_sum, t.value_sum, s.value_sum),
+            value_min = LEAST(COALESCE(t.value_min, s.value_min), COALESCE(s.value_min, t.value_min)),
+            value_max = GREATEST(COALESCE(t.value_max, s.value_max), COALESCE(s.value_max, t.value_max)),
+            updated_date = CURRENT_TIMESTAMP()
+        WHEN NOT MATCHED THEN INSERT (
+            patient_id, measure_class, measure_key, bucket_date,
+            record_count, value_count, value_sum, value_min, value_max
+        )
+        VALUES (
+            s.patient_id, s.measure_class, s.measure_key, s.bucket_date,
+            s.record_count, s.value_count, s.value_sum, s.value_min, s.value_max
+        )
+    """
+    
     def __init__(
         self,
         account_id: str,
@@ -25,6 +183,17 @@ class SnowflakeClient:
         warehouse: str,
         database: str = "HEALTH_INTELLIGENCE",
         schema: str = "HEALTH_RECORDS",
+        insert_batch_size: int = DEFAULT_INSERT_BATCH_SIZE,
+        stage_load_threshold: Optional[int] = DEFAULT_STAGE_LOAD_THRESHOLD,
+        stage_name: str = "RAW_DATA",
+        stage_file_rows: int = DEFAULT_STAGE_FILE_ROWS,
+        patient_cache_size: int = 4096,
+        patient_cache_ttl: Optional[float] = 600.0,
+        import_id_sequence: str = "IMPORT_ID_SEQ",
+        import_id_block_size: int = DEFAULT_IMPORT_ID_BLOCK_SIZE,
+        result_cache_size: int = 512,
+        result_cache_ttl: Optional[float] = 300.0,
+        result_cache_max_rows: int = 10000,
     ):
         """
         Initialize Snowflake client
@@ -36,12 +205,46 @@ class SnowflakeClient:
             warehouse: Warehouse name
             database: Database name
             schema: Schema name
+            insert_batch_size: Records per batched INSERT during imports
+            stage_load_threshold: Record count from which imports are loaded via
+                stage + COPY INTO instead of INSERTs (None disables)
+            stage_name: Internal stage used for bulk loads
+            stage_file_rows: Maximum records per staged NDJSON file
+            patient_cache_size: Patient identities whose patient_id is cached
+            patient_cache_ttl: Seconds a cached patient_id stays valid
+            import_id_sequence: Sequence that allocates IMPORTS.import_id
+            import_id_block_size: Import ids fetched from the sequence at once
+            result_cache_size: Patient query results kept in the result cache
+            result_cache_ttl: Seconds a cached query result stays valid
+            result_cache_max_rows: Results with more rows than this are not cached
         """
         self.account_id = account_id
         self.username = username
         self.warehouse = warehouse
         self.database = database
         self.schema = schema
+        self.insert_batch_size = insert_batch_size
+        self.stage_load_threshold = stage_load_threshold
+        self.stage_name = stage_name
+        self.stage_file_rows = stage_file_rows
+        
+        # patient_identity -> patient_id, saves a round trip per tool call
+        self._patient_ids = TTLCache(maxsize=patient_cache_size, ttl=patient_cache_ttl)
+        
+        # Prefetched import ids (unused ones are simply skipped on restart)
+        self.import_id_sequence = import_id_sequence
+        self.import_id_block_size = import_id_block_size
+        self._import_ids: deque = deque()
+        self._import_id_lock = threading.Lock()
+        
+        # (patient_id, generation, normalized SQL, params) -> result. An import
+        # bumps the patient's generation and drops its entries, so a query
+        # that raced the import can never store a pre-import result.
+        self.result_cache_max_rows = result_cache_max_rows
+        self._results = TTLCache(maxsize=result_cache_size, ttl=result_cache_ttl)
+        self._result_generations: Dict[int, int] = {}
+        self._result_epoch = 0  # Bumped when every patient's results are dropped
+        self._invalidation_listeners: List[Callable[[Optional[int]], None]] = []
         
         self._connection = None
         self._password = password
@@ -49,19 +252,31 @@ class SnowflakeClient:
     def connect(self) -> bool:
         """Establish connection to Snowflake"""
         try:
-            self._connection = connect(
-                account=self.account_id,
-                user=self.username,
-                password=self._password,
-                warehouse=self.warehouse,
-                database=self.database,
-                schema=self.schema,
-            )
+            self._connection = self.open_connection()
             return True
         except Exception as e:
             print(f"ERROR: Failed to connect to Snowflake: {e}")
             return False
     
+    def open_connection(self):
+        """
+        Open a new Snowflake connection with this client's settings
+        
+        Uses qmark (?) placeholders, which Snowflake binds server-side, so a
+        statement keeps the same text for every patient and can reuse its
+        compiled plan and result cache. (The connector's default pyformat
+        style interpolates values into the SQL on the client.)
+        """
+        return connect(
+            account=self.account_id,
+            user=self.username,
+            password=self._password,
+            warehouse=self.warehouse,
+            database=self.database,
+            schema=self.schema,
+            paramstyle=self.PARAMSTYLE,
+        )
+    
     def disconnect(self):
         """Close Snowflake connection"""
         if self._connection:
@@ -72,6 +287,21 @@ class SnowflakeClient:
         """Check if connection is active"""
         return self._connection is not None
     
+    @contextmanager
+    def _checkout(self, shared: bool = True) -> Iterator[Any]:
+        """
+        Yield the connection an operation should run on
+        
+        Every method goes through here so subclasses (see PooledSnowflakeClient)
+        can hand out pooled connections. Nested calls must see the same
+        connection so that multi-statement transactions stay on one session.
+        
+        Args:
+            shared: Whether nested calls on this thread may reuse the connection.
+                Generators pass False since they can outlive the calling frame.
+        """
+        yield self._connection
+    
     def execute_query(self, query: str, params: Optional[List] = None) -> List[Dict]:
         """
         Execute a query and return results as list of dicts
@@ -87,8 +317,130 @@ class SnowflakeClient:
             raise RuntimeError("Not connected to Snowflake")
         
         try:
-            cursor = self._connection.cursor()
+            with self._checkout() as conn:
+                return self._fetch_dicts(conn, query, params)
             
+        except Exception as e:
+            print(f"ERROR executing query: {e}")
+            raise
+    
+    def iter_query(
+        self,
+        query: str,
+        params: Optional[List] = None,
+        batch_size: Optional[int] = None,
+        batches: bool = False,
+    ) -> Iterator[Any]:
+        """
+        Execute a query and stream results without materializing them
+        
+        Rows are pulled with fetchmany() so at most one batch is held in
+        memory. The connection stays checked out until the generator is
+        exhausted or closed.
+        
+        Args:
+            query: SQL query string
+            params: Optional parameter list for parameterized queries
+            batch_size: Rows per fetchmany() call (defaults to DEFAULT_FETCH_BATCH_SIZE)
+            batches: Yield lists of row dicts per fetch instead of single rows
+            
+        Yields:
+            Result rows as dictionaries (or lists of them when batches=True)
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Snowflake")
+        
+        batch_size = batch_size or self.DEFAULT_FETCH_BATCH_SIZE
+        
+        with self._checkout(shared=False) as conn:
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                
+                columns = [desc[0] for desc in cursor.description]
+                
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    if batches:
+                        yield [dict(zip(columns, row)) for row in rows]
+                    else:
+                        for row in rows:
+                            yield dict(zip(columns, row))
+            except Exception as e:
+                print(f"ERROR executing query: {e}")
+                raise
+            finally:
+                cursor.close()
+    
+    def iter_arrow_batches(self, query: str, params: Optional[List] = None) -> Iterator[Any]:
+        """
+        Execute a query and stream results as Arrow tables
+        
+        Uses the connector's fetch_arrow_batches(), which needs the pyarrow
+        extra (snowflake-connector-python[pandas]). Each yielded
+        pyarrow.Table holds one result chunk as typed columns, skipping the
+        per-row Python object conversion of execute_query.
+        
+        Args:
+            query: SQL query string
+            params: Optional parameter list for parameterized queries
+            
+        Yields:
+            pyarrow.Table per result chunk
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Snowflake")
+        
+        with self._checkout(shared=False) as conn:
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                
+                yield from cursor.fetch_arrow_batches()
+            except Exception as e:
+                print(f"ERROR executing query: {e}")
+                raise
+            finally:
+                cursor.close()
+    
+    def fetch_columns(self, query: str, params: Optional[List] = None) -> Dict[str, Any]:
+        """
+        Execute a query and return the result as columns
+        
+        Arrow batches are concatenated per column, so numeric work can run
+        vectorized over whole columns. Columns are NumPy arrays (DATE columns
+        become datetime64[D]).
+        
+        Args:
+            query: SQL query string
+            params: Optional parameter list for parameterized queries
+            
+        Returns:
+            Dictionary of column name -> array of values (empty if no rows)
+        """
+        chunks: Dict[str, List] = {}
+        for table in self.iter_arrow_batches(query, params):
+            for name in table.column_names:
+                chunks.setdefault(name, []).append(table.column(name).to_numpy())
+        
+        return {
+            name: parts[0] if len(parts) == 1 else np.concatenate(parts)
+            for name, parts in chunks.items()
+        }
+    
+    @staticmethod
+    def _fetch_dicts(conn, query: str, params: Optional[List] = None) -> List[Dict]:
+        """Run a query on a connection and return rows as dicts"""
+        cursor = conn.cursor()
+        try:
             if params:
                 cursor.execute(query, params)
             else:
@@ -102,24 +454,199 @@ class SnowflakeClient:
             for row in cursor.fetchall():
                 results.append(dict(zip(columns, row)))
             
-            cursor.close()
             return results
-            
-        except Exception as e:
-            print(f"ERROR executing query: {e}")
-            raise
+        finally:
+            cursor.close()
     
     def get_patient_id(self, patient_identity: str) -> Optional[int]:
-        """Get patient_id from patient_identity"""
+        """Get patient_id from patient_identity (cached)"""
+        patient_id = self._patient_ids.get(patient_identity)
+        if patient_id is not None:
+            return patient_id
+        
         try:
             results = self.execute_query(
-                "SELECT patient_id FROM PATIENTS WHERE patient_identity = %s",
+                "SELECT patient_id FROM PATIENTS WHERE patient_identity = ?",
                 [patient_identity]
             )
-            return results[0]["PATIENT_ID"] if results else None
         except Exception as e:
             print(f"ERROR getting patient ID: {e}")
             return None
+        
+        # Unknown identities are not cached: they may be created at any time
+        patient_id = results[0]["PATIENT_ID"] if results else None
+        if patient_id is not None:
+            self._patient_ids.set(patient_identity, patient_id)
+        return patient_id
+    
+    def invalidate_patient(self, patient_identity: Optional[str] = None):
+        """Forget the cached patient_id for one identity, or for all when None"""
+        self._patient_ids.invalidate(patient_identity)
+    
+    def patient_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the patient_id cache"""
+        return self._patient_ids.stats()
+    
+    def cached_query(self, patient_id: int, query: str, params: Optional[List] = None) -> List[Dict]:
+        """
+        execute_query through the per-patient result cache
+        
+        Use for queries scoped to one patient's rows: the entry is dropped
+        as soon as an import commits new records for that patient.
+        
+        Args:
+            patient_id: Patient whose data the query reads
+            query: SQL query string
+            params: Optional parameter list for parameterized queries
+            
+        Returns:
+            List of result rows as dictionaries
+        """
+        return self.cached_result(patient_id, query, params, lambda: self.execute_query(query, params))
+    
+    def cached_result(
+        self,
+        patient_id: int,
+        query: str,
+        params: Optional[List],
+        loader: Callable[[], Any],
+    ) -> Any:
+        """
+        Return the cached value for a patient query, computing it with loader on a miss
+        
+        Lets callers cache a derived form of a result (e.g. a streamed page
+        plus total count) under the query's cache key.
+        """
+        generation = self._result_generation(patient_id)
+        key = self._result_key(patient_id, generation, query, params)
+        
+        cached = self._results.get(key, self._CACHE_MISS)
+        if cached is not self._CACHE_MISS:
+            return cached
+        
+        result = loader()
+        self._store_result(patient_id, generation, key, result)
+        return result
+    
+    def cached_results(
+        self,
+        patient_id: int,
+        queries: List[Tuple[str, Optional[List]]],
+        loader: Callable[[List[int]], List[Any]],
+    ) -> List[Any]:
+        """
+        Batch form of cached_result for several queries on one patient
+        
+        Cached queries are answered from the cache; loader is called once
+        with the indexes (into queries) of the misses and must return their
+        results in the same order, so it can fetch them in one round trip.
+        Each result is then cached under its own query's key.
+        
+        Args:
+            patient_id: Patient whose data the queries read
+            queries: (query, params) pairs
+            loader: Callable mapping miss indexes to their results
+            
+        Returns:
+            One result per query, in order
+        """
+        generation = self._result_generation(patient_id)
+        keys = [self._result_key(patient_id, generation, query, params) for query, params in queries]
+        
+        results = [self._results.get(key, self._CACHE_MISS) for key in keys]
+        
+        # Identical queries are loaded once
+        first_index: Dict[Any, int] = {}
+        for index, result in enumerate(results):
+            if result is self._CACHE_MISS:
+                first_index.setdefault(keys[index], index)
+        misses = list(first_index.values())
+        if not misses:
+            return results
+        
+        for index, result in zip(misses, loader(misses)):
+            self._store_result(patient_id, generation, keys[index], result)
+            results[index] = result
+        
+        for index, key in enumerate(keys):
+            if results[index] is self._CACHE_MISS:
+                results[index] = results[first_index[key]]
+        return results
+    
+    def iter_cached_query(
+        self,
+        patient_id: int,
+        query: str,
+        params: Optional[List] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """
+        Streaming form of cached_query
+        
+        A cached result is replayed from memory. Otherwise rows are streamed
+        with iter_query and, once the result has been read to the end, cached
+        if it has no more than result_cache_max_rows rows.
+        """
+        generation = self._result_generation(patient_id)
+        key = self._result_key(patient_id, generation, query, params)
+        
+        cached = self._results.get(key, self._CACHE_MISS)
+        if cached is not self._CACHE_MISS:
+            yield from cached
+            return
+        
+        rows = []
+        for row in self.iter_query(query, params, batch_size=batch_size):
+            if rows is not None:
+                rows.append(row)
+                if len(rows) > self.result_cache_max_rows:
+                    rows = None  # Too large to cache; keep streaming
+            yield row
+        
+        if rows is not None:
+            self._store_result(patient_id, generation, key, rows)
+    
+    def _result_generation(self, patient_id: int) -> Tuple[int, int]:
+        """Cache generation of a patient's results: (global epoch, patient generation)"""
+        return (self._result_epoch, self._result_generations.get(patient_id, 0))
+    
+    @staticmethod
+    def _result_key(patient_id: int, generation: Tuple[int, int], query: str, params: Optional[List]) -> tuple:
+        return (patient_id, generation, " ".join(query.split()), tuple(params or ()))
+    
+    def _store_result(self, patient_id: int, generation: Tuple[int, int], key: tuple, result: Any):
+        """Cache a loaded result unless it is too large or an import committed meanwhile"""
+        size = len(result) if isinstance(result, (list, tuple)) else 1
+        if size <= self.result_cache_max_rows and self._result_generation(patient_id) == generation:
+            self._results.set(key, result)
+    
+    def add_invalidation_listener(self, listener: Callable[[Optional[int]], None]):
+        """
+        Call listener(patient_id) whenever a patient's cached results are dropped
+        
+        Imports call invalidate_patient_results once they commit, so caches
+        kept outside the client (e.g. trend series) can follow the same hook.
+        patient_id is None when every patient's results are dropped.
+        """
+        self._invalidation_listeners.append(listener)
+    
+    def invalidate_patient_results(self, patient_id: Optional[int] = None):
+        """Drop cached query results for one patient, or for all when None"""
+        if patient_id is None:
+            # Generations only ever grow, so a load that started before this
+            # call can never match the current generation when it stores
+            self._result_epoch += 1
+            self._results.invalidate()
+        else:
+            self._result_generations[patient_id] = self._result_generations.get(patient_id, 0) + 1
+            self._results.invalidate_matching(lambda key: key[0] == patient_id)
+        
+        for listener in self._invalidation_listeners:
+            listener(patient_id)
+    
+    def result_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the query result cache"""
+        return self._results.stats()
     
     def create_or_get_patient(self, patient_identity: str) -> int:
         """
@@ -137,28 +664,74 @@ class SnowflakeClient:
             return patient_id
         
         # Create new patient
-        try:
-            cursor = self._connection.cursor()
-            cursor.execute(
-                """
-                INSERT INTO PATIENTS (patient_identity, created_date, updated_date)
-                VALUES (%s, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
-                """,
-                [patient_identity]
-            )
+        return self.create_or_get_patients([patient_identity])[patient_identity]
+    
+    def create_or_get_patients(self, patient_identities: Iterable[str]) -> Dict[str, int]:
+        """
+        Resolve many patient identities, creating the missing ones
+        
+        Identities not already cached are upserted with one MERGE and read
+        back with one lookup (per PATIENT_MERGE_CHUNK_SIZE identities).
+        MERGE only inserts identities that do not exist yet, so concurrent
+        imports cannot create duplicate patients the way SELECT-then-INSERT
+        could.
+        
+        Args:
+            patient_identities: Patient names/identifiers (duplicates allowed)
             
-            # Query the newly inserted patient using their identity (since they should be unique)
-            results = self.execute_query(
-                "SELECT patient_id FROM PATIENTS WHERE patient_identity = %s",
-                [patient_identity]
-            )
+        Returns:
+            Dictionary of patient_identity -> patient_id
+        """
+        identities = list(dict.fromkeys(patient_identities))
+        
+        patient_ids = {}
+        missing = []
+        for identity in identities:
+            patient_id = self._patient_ids.get(identity)
+            if patient_id is None:
+                missing.append(identity)
+            else:
+                patient_ids[identity] = patient_id
+        
+        if not missing:
+            return patient_ids
+        
+        try:
+            with self._checkout() as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(missing), self.PATIENT_MERGE_CHUNK_SIZE):
+                    chunk = missing[start:start + self.PATIENT_MERGE_CHUNK_SIZE]
+                    placeholders = ", ".join(["(?)"] * len(chunk))
+                    cursor.execute(
+                        f"""
+                        MERGE INTO PATIENTS t
+                        USING (SELECT column1 AS patient_identity FROM VALUES {placeholders}) s
+                        ON t.patient_identity = s.patient_identity
+                        WHEN NOT MATCHED THEN INSERT (patient_identity, created_date, updated_date)
+                        VALUES (s.patient_identity, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
+                        """,
+                        chunk
+                    )
+                    
+                    # MIN() keeps the result stable if legacy duplicates exist
+                    cursor.execute(
+                        f"""
+                        SELECT patient_identity, MIN(patient_id)
+                        FROM PATIENTS
+                        WHERE patient_identity IN ({", ".join(["?"] * len(chunk))})
+                        GROUP BY patient_identity
+                        """,
+                        chunk
+                    )
+                    for identity, patient_id in cursor.fetchall():
+                        patient_ids[identity] = patient_id
+                        self._patient_ids.set(identity, patient_id)
+                cursor.close()
             
-            patient_id = results[0]["PATIENT_ID"] if results else None
-            cursor.close()
-            return patient_id
+            return patient_ids
             
         except Exception as e:
-            print(f"ERROR creating patient: {e}")
+            print(f"ERROR creating patients: {e}")
             raise
     
     def import_health_records(
@@ -167,15 +740,27 @@ class SnowflakeClient:
         records: List[HealthRecord],
         import_source: str = "pdf_extraction",
         import_stats: Optional[Dict] = None,
+        batch_size: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Import health records for a patient
         
+        Records are written in chunks of ``batch_size`` rows per multi-row
+        INSERT inside a single transaction. A chunk that fails is split in half
+        and retried until the offending records are isolated, so one bad record
+        only costs its own row. Imports of stage_load_threshold records or more
+        are instead staged as compressed NDJSON and loaded with one COPY INTO.
+        
+        Every record is filed under the patient_identity argument, whatever
+        the record's own patient_identity says. Use
+        import_health_records_batch() for records spanning several patients.
+        
         Args:
             patient_identity: Patient identifier
             records: List of HealthRecord objects
             import_source: Source of import (e.g., "pdf_extraction")
             import_stats: Optional statistics about the import
+            batch_size: Records per INSERT round trip (defaults to insert_batch_size)
             
         Returns:
             Import result summary
@@ -183,83 +768,173 @@ class SnowflakeClient:
         if not self.is_connected():
             raise RuntimeError("Not connected to Snowflake")
         
+        batch_size = max(1, batch_size or self.insert_batch_size)
+        
         try:
-            cursor = self._connection.cursor()
-            
-            # Get or create patient
-            patient_id = self.create_or_get_patient(patient_identity)
-            
-            # Create import record
-            cursor.execute(
-                """
-                INSERT INTO IMPORTS (
-                    patient_id, import_date, source_files, 
-                    records_by_type, import_statistics, import_status
+            with self._checkout() as conn:
+                patient_id = self.create_or_get_patient(patient_identity)
+                summary = self._import_patient_records(
+                    conn, patient_identity, patient_id, records, import_stats, batch_size
                 )
-                VALUES (%s, CURRENT_TIMESTAMP(), %s, %s, %s, %s)
-                """,
-                [
-                    patient_id,
-                    json.dumps({}),  # source_files
-                    json.dumps({}),  # records_by_type
-                    json.dumps(import_stats or {}),  # import_statistics
-                    "IN_PROGRESS"
-                ]
-            )
             
-            # Get the import_id - in Snowflake we need to query for it
-            import_results = self.execute_query(
-                """
-                SELECT import_id FROM IMPORTS 
-                WHERE patient_id = %s AND import_status = 'IN_PROGRESS'
-                ORDER BY import_date DESC
-                LIMIT 1
-                """,
-                [patient_id]
-            )
-            
-            import_id = import_results[0]["IMPORT_ID"] if import_results else None
+            return {"success": True, **summary}
             
-            # Insert health records
-            inserted_count = 0
-            failed_count = 0
-            record_types = {}
+        except Exception as e:
+            print(f"ERROR in import_health_records: {e}")
+            raise
+    
+    def import_health_records_batch(
+        self,
+        records: List[HealthRecord],
+        import_source: str = "batch_import",
+        import_stats: Optional[Dict] = None,
+        parallelism: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Import records for many patients, loading patients in parallel
+        
+        Records are partitioned by patient_identity, all patients are
+        resolved with one create_or_get_patients() call, and the partitions
+        are then imported concurrently, each on its own connection and under
+        its own IMPORTS row. A failing patient does not stop the others.
+        
+        Args:
+            records: HealthRecord objects for any number of patients
+            import_source: Source of import (e.g., "clinic_sync")
+            import_stats: Optional statistics stored with every patient's import
+            parallelism: Patients imported at once (capped at max_concurrency,
+                so a plain single-connection client imports serially)
+            batch_size: Records per INSERT round trip (defaults to insert_batch_size)
             
-            for record in records:
-                try:
-                    cursor.execute(
-                        """
-                        INSERT INTO HEALTH_RECORDS (
-                            patient_id, import_id, record_class, 
-                            record_date, provider_identity, data_json,
-                            extraction_confidence, verification_status
-                        )
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                        """,
-                        [
-                            patient_id,
-                            import_id,
-                            record.record_class.value,
-                            record.record_date,
-                            record.provider_identity,
-                            json.dumps(record.data),
-                            record.extraction_confidence,
-                            "unverified"
-                        ]
+        Returns:
+            Combined summary with per-patient results under "patients"
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Snowflake")
+        
+        batch_size = max(1, batch_size or self.insert_batch_size)
+        parallelism = max(1, min(parallelism or self.DEFAULT_IMPORT_PARALLELISM, self.max_concurrency))
+        
+        records_by_patient: Dict[str, List[HealthRecord]] = {}
+        for record in records:
+            records_by_patient.setdefault(record.patient_identity, []).append(record)
+        
+        started = time.perf_counter()
+        patient_ids = self.create_or_get_patients(records_by_patient)
+        
+        def import_partition(identity: str) -> Dict[str, Any]:
+            try:
+                with self._checkout() as conn:
+                    return self._import_patient_records(
+                        conn, identity, patient_ids[identity], records_by_patient[identity],
+                        import_stats, batch_size,
                     )
-                    inserted_count += 1
-                    record_types[record.record_class.value] = record_types.get(record.record_class.value, 0) + 1
-                    
-                except Exception as e:
-                    print(f"ERROR inserting record: {e}")
-                    failed_count += 1
+            except Exception as e:
+                print(f"ERROR importing records for {identity}: {e}", file=sys.stderr)
+                return {
+                    "patient_identity": identity,
+                    "patient_id": patient_ids.get(identity),
+                    "error": str(e),
+                    "records_inserted": 0,
+                    "records_failed": len(records_by_patient[identity]),
+                    "record_types": {},
+                }
+        
+        with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="health-import") as executor:
+            summaries = list(executor.map(import_partition, records_by_patient))
+        
+        elapsed = time.perf_counter() - started
+        inserted_count = sum(summary["records_inserted"] for summary in summaries)
+        record_types = {}
+        for summary in summaries:
+            for record_class, count in summary["record_types"].items():
+                record_types[record_class] = record_types.get(record_class, 0) + count
+        failed_patients = [summary["patient_identity"] for summary in summaries if "error" in summary]
+        
+        print(
+            f"Batch imported {inserted_count} records for {len(summaries)} patients "
+            f"({len(failed_patients)} failed) in {elapsed:.2f}s with parallelism {parallelism}",
+            file=sys.stderr,
+        )
+        
+        return {
+            "success": not failed_patients,
+            "patient_count": len(summaries),
+            "records_inserted": inserted_count,
+            "records_failed": sum(summary["records_failed"] for summary in summaries),
+            "record_types": record_types,
+            "failed_patients": failed_patients,
+            "parallelism": parallelism,
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(inserted_count / elapsed, 1) if elapsed > 0 else float(inserted_count),
+            "patients": {summary["patient_identity"]: summary for summary in summaries},
+        }
+    
+    def _import_patient_records(
+        self,
+        conn,
+        patient_identity: str,
+        patient_id: int,
+        records: List[HealthRecord],
+        import_stats: Optional[Dict],
+        batch_size: int,
+    ) -> Dict[str, Any]:
+        """
+        Import one patient's records under a new IMPORTS row
+        
+        Returns:
+            Per-patient import summary
+        """
+        cursor = conn.cursor()
+        
+        # Create import record under an id allocated up front
+        import_id = self._allocate_import_id(cursor)
+        cursor.execute(
+            """
+            INSERT INTO IMPORTS (
+                import_id, patient_id, import_date, source_files, 
+                records_by_type, import_statistics, import_status
+            )
+            VALUES (?, ?, CURRENT_TIMESTAMP(), ?, ?, ?, ?)
+            """,
+            [
+                import_id,
+                patient_id,
+                json.dumps({}),  # source_files
+                json.dumps({}),  # records_by_type
+                json.dumps(import_stats or {}),  # import_statistics
+                "IN_PROGRESS"
+            ]
+        )
+        
+        # Write health records within one transaction: bulk imports go
+        # through the RAW_DATA stage, smaller ones through batched INSERTs
+        use_stage = (
+            self.stage_load_threshold is not None
+            and len(records) >= self.stage_load_threshold
+        )
+        started = time.perf_counter()
+        cursor.execute("BEGIN")
+        try:
+            if use_stage:
+                inserted_count, failed_count, record_types = self._copy_records_via_stage(
+                    cursor, patient_id, import_id, records
+                )
+            else:
+                inserted_count, failed_count, record_types = self._insert_records_batched(
+                    cursor, patient_id, import_id, records, batch_size
+                )
+            self._project_typed_records(cursor, "import_id = ?", [import_id], record_types)
+            if record_types.get(RecordClass.LAB.value) or record_types.get(RecordClass.VITAL.value):
+                self._update_rollups(cursor, import_id)
             
             # Update import status
             cursor.execute(
                 """
                 UPDATE IMPORTS 
-                SET import_status = %s, records_by_type = %s
-                WHERE import_id = %s
+                SET import_status = ?, records_by_type = ?
+                WHERE import_id = ?
                 """,
                 [
                     "SUCCESS" if failed_count == 0 else "PARTIAL",
@@ -267,21 +942,344 @@ class SnowflakeClient:
                     import_id
                 ]
             )
-            
-            cursor.close()
-            
-            return {
-                "success": True,
-                "patient_id": patient_id,
-                "import_id": import_id,
-                "records_inserted": inserted_count,
-                "records_failed": failed_count,
-                "record_types": record_types,
-            }
-            
+            cursor.execute("COMMIT")
+            self.invalidate_patient_results(patient_id)
         except Exception as e:
-            print(f"ERROR in import_health_records: {e}")
+            cursor.execute("ROLLBACK")
+            cursor.execute(
+                "UPDATE IMPORTS SET import_status = ?, error_message = ? WHERE import_id = ?",
+                ["FAILED", str(e)[:2000], import_id]
+            )
             raise
+        
+        elapsed = time.perf_counter() - started
+        records_per_second = inserted_count / elapsed if elapsed > 0 else float(inserted_count)
+        print(
+            f"Imported {inserted_count} records ({failed_count} failed) in {elapsed:.2f}s "
+            f"- {records_per_second:.0f} records/sec "
+            f"({'stage COPY' if use_stage else f'batch size {batch_size}'})",
+            file=sys.stderr,
+        )
+        
+        cursor.close()
+        
+        return {
+            "patient_identity": patient_identity,
+            "patient_id": patient_id,
+            "import_id": import_id,
+            "records_inserted": inserted_count,
+            "records_failed": failed_count,
+            "record_types": record_types,
+            "records_per_second": round(records_per_second, 1),
+            "elapsed_seconds": elapsed,
+        }
+    
+    def _project_typed_records(
+        self,
+        cursor,
+        scope: str,
+        params: List,
+        record_types: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Write LAB_RESULTS / VITAL_READINGS rows for HEALTH_RECORDS rows in scope
+        
+        Args:
+            cursor: Cursor inside the import transaction
+            scope: SQL predicate on HEALTH_RECORDS selecting the rows to project
+            params: Bind parameters for scope
+            record_types: Inserted counts per record class; classes with no
+                rows are skipped (None projects both)
+        """
+        if record_types is None or record_types.get(RecordClass.LAB.value):
+            cursor.execute(self.LAB_PROJECTION_SQL.format(scope=scope), params)
+        if record_types is None or record_types.get(RecordClass.VITAL.value):
+            cursor.execute(
+                self.VITAL_PROJECTION_SQL.format(scope=scope, vital_key=self._vital_key_sql("doc:vital_type::STRING")),
+                params,
+            )
+    
+    def backfill_typed_projections(self) -> Dict[str, int]:
+        """
+        Project HEALTH_RECORDS rows imported before LAB_RESULTS / VITAL_READINGS existed
+        
+        Safe to re-run: rows that already have a projection are skipped.
+        Follow with rebuild_rollups() to fold the new rows into the rollups.
+        
+        Returns:
+            Rows added per projection table
+        """
+        scope = (
+            "record_id NOT IN (SELECT record_id FROM LAB_RESULTS "
+            "UNION ALL SELECT record_id FROM VITAL_READINGS)"
+        )
+        with self._checkout() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.LAB_PROJECTION_SQL.format(scope=scope))
+                lab_rows = cursor.rowcount or 0
+                cursor.execute(
+                    self.VITAL_PROJECTION_SQL.format(scope=scope, vital_key=self._vital_key_sql("doc:vital_type::STRING"))
+                )
+                vital_rows = cursor.rowcount or 0
+            finally:
+                cursor.close()
+        
+        self.invalidate_patient_results()
+        return {"LAB_RESULTS": lab_rows, "VITAL_READINGS": vital_rows}
+    
+    def _update_rollups(self, cursor, import_id: int):
+        """Merge an import's lab and vital values into the daily and monthly rollups"""
+        for table, bucket in self.ROLLUP_BUCKETS.items():
+            cursor.execute(self.ROLLUP_MERGE_SQL.format(table=table, bucket=bucket), [import_id])
+    
+    def rebuild_rollups(self):
+        """
+        Recompute the daily and monthly rollups from MEASUREMENTS
+        
+        Only needed after backfill_typed_projections() or manual edits
+        (deploy_schema.py runs both); imports keep the rollups current on
+        their own.
+        """
+        with self._checkout() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN")
+                for table, bucket in self.ROLLUP_BUCKETS.items():
+                    cursor.execute(f"DELETE FROM {table}")
+                    cursor.execute(
+                        f"""
+                        INSERT INTO {table} (
+                            patient_id, measure_class, measure_key, bucket_date,
+                            record_count, value_count, value_sum, value_min, value_max
+                        )
+                        SELECT
+                            patient_id, measure_class, measure_key, {bucket},
+                            COUNT(*), COUNT(value_numeric), SUM(value_numeric),
+                            MIN(value_numeric), MAX(value_numeric)
+                        FROM MEASUREMENTS
+                        GROUP BY 1, 2, 3, 4
+                        """
+                    )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+        
+        self.invalidate_patient_results()
+    
+    @classmethod
+    def _vital_key_sql(cls, expression: str) -> str:
+        """SQL CASE folding a vital type expression into its VITAL_CLASS_ALIASES key"""
+        normalized = f"LOWER(TRIM({expression}))"
+        branches = " ".join(
+            "WHEN {} IN ({}) THEN '{}'".format(
+                normalized, ", ".join(f"'{alias}'" for alias in aliases), key
+            )
+            for key, aliases in cls.VITAL_CLASS_ALIASES.items()
+        )
+        return f"CASE {branches} ELSE {normalized} END"
+    
+    @classmethod
+    def vital_key(cls, vital_type: str) -> str:
+        """Python twin of _vital_key_sql: the VITAL_READINGS.vital_key for a vital type"""
+        normalized = (vital_type or "").strip().lower()
+        for key, aliases in cls.VITAL_CLASS_ALIASES.items():
+            if normalized in aliases:
+                return key
+        return normalized
+    
+    def _allocate_import_id(self, cursor) -> int:
+        """
+        Take the next import_id from the locally cached sequence block
+        
+        Refills the block with one query when it runs dry. Sequence values
+        are unique across sessions, so parallel imports never share an id.
+        """
+        with self._import_id_lock:
+            if not self._import_ids:
+                cursor.execute(
+                    f"SELECT {self.import_id_sequence}.NEXTVAL "
+                    f"FROM TABLE(GENERATOR(ROWCOUNT => {int(self.import_id_block_size)}))"
+                )
+                self._import_ids.extend(sorted(row[0] for row in cursor.fetchall()))
+            return self._import_ids.popleft()
+    
+    def _insert_records_batched(
+        self,
+        cursor,
+        patient_id: int,
+        import_id: Optional[int],
+        records: List[HealthRecord],
+        batch_size: int,
+    ) -> Tuple[int, int, Dict[str, int]]:
+        """
+        Insert records with one multi-row INSERT per chunk of batch_size
+        
+        Returns:
+            Tuple of (inserted count, failed count, inserted counts per record class)
+        """
+        inserted = []
+        failed_count = 0
+        for start in range(0, len(records), batch_size):
+            chunk = records[start:start + batch_size]
+            ok, failed = self._insert_record_chunk(cursor, patient_id, import_id, chunk)
+            inserted.extend(ok)
+            failed_count += failed
+        
+        record_types = {}
+        for record in inserted:
+            record_types[record.record_class.value] = record_types.get(record.record_class.value, 0) + 1
+        
+        return len(inserted), failed_count, record_types
+    
+    def _insert_record_chunk(
+        self,
+        cursor,
+        patient_id: int,
+        import_id: Optional[int],
+        records: List[HealthRecord],
+    ) -> Tuple[List[HealthRecord], int]:
+        """
+        Insert a chunk of records with one multi-row INSERT
+        
+        On failure the chunk is bisected and each half retried, so only the
+        records that actually fail are dropped.
+        
+        Returns:
+            Tuple of (inserted records, failed record count)
+        """
+        if not records:
+            return [], 0
+        
+        try:
+            cursor.execute(
+                self.INSERT_HEALTH_RECORD_SQL.format(
+                    rows=", ".join([self.HEALTH_RECORD_VALUES_ROW] * len(records))
+                ),
+                [
+                    value
+                    for record in records
+                    for value in self._record_row(patient_id, import_id, record)
+                ],
+            )
+            return list(records), 0
+        except Exception as e:
+            if len(records) == 1:
+                print(f"ERROR inserting record: {e}")
+                return [], 1
+        
+        middle = len(records) // 2
+        left_ok, left_failed = self._insert_record_chunk(cursor, patient_id, import_id, records[:middle])
+        right_ok, right_failed = self._insert_record_chunk(cursor, patient_id, import_id, records[middle:])
+        return left_ok + right_ok, left_failed + right_failed
+    
+    def _copy_records_via_stage(
+        self,
+        cursor,
+        patient_id: int,
+        import_id: Optional[int],
+        records: List[HealthRecord],
+    ) -> Tuple[int, int, Dict[str, int]]:
+        """
+        Bulk load records through the RAW_DATA stage
+        
+        Records are written to local gzip-compressed NDJSON files (at most
+        stage_file_rows lines each), PUT to a per-import folder of the stage
+        and loaded with a single COPY INTO HEALTH_RECORDS. Rows that fail to
+        parse are skipped (ON_ERROR = CONTINUE) and reported as failed.
+        
+        Returns:
+            Tuple of (inserted count, failed count, inserted counts per record class)
+        """
+        stage_path = f"@{self.database}.{self.schema}.{self.stage_name}/imports/{import_id}/"
+        
+        with tempfile.TemporaryDirectory(prefix="health_import_") as tmp_dir:
+            for file_index, start in enumerate(range(0, len(records), self.stage_file_rows)):
+                file_path = Path(tmp_dir) / f"records_{file_index:04d}.ndjson.gz"
+                with gzip.open(file_path, "wt", encoding="utf-8") as f:
+                    for record in records[start:start + self.stage_file_rows]:
+                        f.write(json.dumps(self._record_document(patient_id, import_id, record)))
+                        f.write("\n")
+            
+            cursor.execute(
+                f"PUT 'file://{Path(tmp_dir).as_posix()}/records_*.ndjson.gz' '{stage_path}' "
+                "AUTO_COMPRESS = FALSE SOURCE_COMPRESSION = GZIP OVERWRITE = TRUE PARALLEL = 8"
+            )
+        
+        cursor.execute(
+            f"""
+            COPY INTO HEALTH_RECORDS (
+                patient_id, import_id, record_class,
+                record_date, provider_identity, data_json, data_variant,
+                extraction_confidence, verification_status
+            )
+            FROM (
+                SELECT
+                    $1:patient_id::INTEGER,
+                    $1:import_id::INTEGER,
+                    $1:record_class::STRING,
+                    $1:record_date::DATE,
+                    $1:provider_identity::STRING,
+                    $1:data_json::STRING,
+                    $1:data,
+                    $1:extraction_confidence::DECIMAL(5, 2),
+                    $1:verification_status::STRING
+                FROM '{stage_path}'
+            )
+            FILE_FORMAT = (TYPE = 'JSON' COMPRESSION = 'GZIP')
+            ON_ERROR = 'CONTINUE'
+            PURGE = TRUE
+            """
+        )
+        columns = [desc[0].upper() for desc in cursor.description or []]
+        inserted_count = 0
+        for row in cursor.fetchall():
+            inserted_count += int(dict(zip(columns, row)).get("ROWS_LOADED") or 0)
+        
+        # COPY only reports per-file totals, so read the per-class breakdown back
+        cursor.execute(
+            """
+            SELECT record_class, COUNT(*) FROM HEALTH_RECORDS
+            WHERE import_id = ?
+            GROUP BY record_class
+            """,
+            [import_id]
+        )
+        record_types = {record_class: count for record_class, count in cursor.fetchall()}
+        
+        return inserted_count, len(records) - inserted_count, record_types
+    
+    @staticmethod
+    def _record_document(patient_id: int, import_id: Optional[int], record: HealthRecord) -> Dict[str, Any]:
+        """Build the NDJSON document staged for one health record"""
+        return {
+            "patient_id": patient_id,
+            "import_id": import_id,
+            "record_class": record.record_class.value,
+            "record_date": record.record_date.isoformat(),
+            "provider_identity": record.provider_identity,
+            "data_json": json.dumps(record.data),
+            "data": record.data,
+            "extraction_confidence": record.extraction_confidence,
+            "verification_status": "unverified",
+        }
+    
+    @staticmethod
+    def _record_row(patient_id: int, import_id: Optional[int], record: HealthRecord) -> Tuple:
+        """Build the INSERT parameter tuple for one health record"""
+        return (
+            patient_id,
+            import_id,
+            record.record_class.value,
+            record.record_date,
+            record.provider_identity,
+            json.dumps(record.data),
+            record.extraction_confidence,
+            "unverified",
+        )
     
     def query_health_data(
         self,
@@ -307,7 +1305,49 @@ class SnowflakeClient:
         if patient_id is None:
             return []
         
-        parameters = parameters or {}
+        sql, query_params = self._health_data_query(patient_id, query_type, parameters or {})
+        
+        try:
+            results = self.cached_query(patient_id, sql, query_params)
+            return results
+            
+        except Exception as e:
+            print(f"ERROR querying health data: {e}")
+            raise
+    
+    def iter_health_data(
+        self,
+        patient_identity: str,
+        query_type: str,
+        parameters: Optional[Dict] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """
+        Streaming variant of query_health_data
+        
+        Yields the same rows one at a time (fetched batch_size at a time), so
+        large results such as all_records never sit in memory in full. Shares
+        query_health_data's result cache (see iter_cached_query).
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Snowflake")
+        
+        patient_id = self.get_patient_id(patient_identity)
+        if patient_id is None:
+            return
+        
+        sql, query_params = self._health_data_query(patient_id, query_type, parameters or {})
+        yield from self.iter_cached_query(patient_id, sql, query_params, batch_size=batch_size)
+    
+    def _health_data_query(
+        self,
+        patient_id: int,
+        query_type: str,
+        parameters: Dict,
+    ) -> Tuple[str, List]:
+        """Build the SQL and bind parameters for a predefined query pattern"""
+        # "Active" means the same as the semantic_query "active" filter
+        active_condition = get_catalog().filter_conditions["active"]
         
         # Define query patterns (Snowflake-specific syntax)
         queries = {
@@ -316,59 +1356,53 @@ class SnowflakeClient:
                     record_id, record_class, record_date, 
                     provider_identity, data_json, extraction_confidence
                 FROM HEALTH_RECORDS
-                WHERE patient_id = %s
+                WHERE patient_id = ?
                 ORDER BY record_date DESC
             """,
             "labs_recent": """
                 SELECT 
                     record_id, record_date, data_json, extraction_confidence
                 FROM HEALTH_RECORDS
-                WHERE patient_id = %s AND record_class = 'LAB'
+                WHERE patient_id = ? AND record_class = 'LAB'
                 ORDER BY record_date DESC
-                LIMIT %s
+                LIMIT ?
             """,
-            "medications_active": """
+            "medications_active": f"""
                 SELECT 
                     record_id, record_date, data_json
                 FROM HEALTH_RECORDS
-                WHERE patient_id = %s AND record_class = 'MEDICATION'
-                AND (TRY_PARSE_JSON(data_json):status::STRING = 'active' OR data_json LIKE '%active%')
+                WHERE patient_id = ? AND record_class = 'MEDICATION'
+                AND {active_condition}
                 ORDER BY record_date DESC
             """,
             "vitals_by_type": """
                 SELECT 
-                    record_id, record_date, data_json
-                FROM HEALTH_RECORDS
-                WHERE patient_id = %s AND record_class = 'VITAL'
-                AND TRY_PARSE_JSON(data_json):'vital_type'::STRING = %s
-                ORDER BY record_date DESC
+                    h.record_id, h.record_date, h.data_json
+                FROM VITAL_READINGS v
+                JOIN HEALTH_RECORDS h ON h.record_id = v.record_id
+                WHERE v.patient_id = ? AND v.vital_key = ?
+                ORDER BY v.record_date DESC
             """,
             "abnormal_labs": """
                 SELECT 
-                    record_id, record_date, data_json
-                FROM HEALTH_RECORDS
-                WHERE patient_id = %s AND record_class = 'LAB'
-                AND TRY_PARSE_JSON(data_json):'abnormal_flag'::STRING IS NOT NULL
-                ORDER BY record_date DESC
+                    h.record_id, h.record_date, h.data_json
+                FROM LAB_RESULTS l
+                JOIN HEALTH_RECORDS h ON h.record_id = l.record_id
+                WHERE l.patient_id = ? AND l.abnormal_flag IS NOT NULL
+                ORDER BY l.record_date DESC
             """,
         }
         
         if query_type not in queries:
             raise ValueError(f"Unknown query type: {query_type}")
         
-        try:
-            sql = queries[query_type]
-            
-            # Build parameters for query
-            query_params = [patient_id]
-            if query_type == "labs_recent":
-                query_params.append(parameters.get("limit", 10))
-            elif query_type == "vitals_by_type":
-                query_params.append(parameters.get("vital_type"))
-            
-            results = self.execute_query(sql, query_params)
-            return results
-            
-        except Exception as e:
-            print(f"ERROR querying health data: {e}")
-            raise
+        sql = queries[query_type]
+        
+        # Build parameters for query
+        query_params = [patient_id]
+        if query_type == "labs_recent":
+            query_params.append(parameters.get("limit", 10))
+        elif query_type == "vitals_by_type":
+            query_params.append(self.vital_key(parameters.get("vital_type")))
+        
+        return sql, query_params
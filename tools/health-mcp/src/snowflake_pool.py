@@ -0,0 +1,363 @@
+"""
+Snowflake Connection Pool
+Thread-safe pool of Snowflake connections shared across MCP tool calls
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from snowflake_client import SnowflakeClient
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class SnowflakeConnectionPool:
+    """
+    Bounded pool of Snowflake connections
+    
+    Connections are created lazily up to max_size and kept warm down to
+    min_size. Idle connections are checked for liveness before reuse and
+    replaced transparently if the session has died; connections idle longer
+    than idle_timeout are closed (never dropping below min_size).
+    """
+    
+    # Number of recent checkout wait times kept for percentile metrics
+    WAIT_SAMPLE_SIZE = 1000
+    
+    def __init__(
+        self,
+        connection_factory: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 600.0,
+        liveness_check_after: float = 60.0,
+        checkout_timeout: float = 30.0,
+    ):
+        """
+        Initialize connection pool
+        
+        Args:
+            connection_factory: Callable returning a new open connection
+            min_size: Connections kept open even when idle
+            max_size: Upper bound on open connections
+            idle_timeout: Seconds an idle connection may sit before eviction
+            liveness_check_after: Idle seconds after which a connection is
+                pinged with SELECT 1 before being handed out
+            checkout_timeout: Seconds to wait for a free connection
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+        
+        self.connection_factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.liveness_check_after = liveness_check_after
+        self.checkout_timeout = checkout_timeout
+        
+        self._lock = threading.Condition()
+        self._idle: deque = deque()  # (connection, last_used) pairs, most recent last
+        self._size = 0  # open connections, idle + checked out
+        self._closed = False
+        
+        # Metrics
+        self._checkouts = 0
+        self._created = 0
+        self._evicted = 0
+        self._reconnects = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits: deque = deque(maxlen=self.WAIT_SAMPLE_SIZE)
+    
+    def open(self):
+        """Create the minimum number of connections up front"""
+        with self._lock:
+            self._closed = False
+            missing = self.min_size - self._size
+            self._size += max(0, missing)
+        
+        for _ in range(max(0, missing)):
+            try:
+                connection = self._create()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+            self.release(connection)
+    
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Check out a live connection, waiting up to timeout seconds
+        
+        Raises:
+            PoolTimeoutError: If no connection frees up in time
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = started + timeout
+        
+        connection = None
+        last_used = 0.0
+        create = False
+        
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._evict_idle_locked()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"No Snowflake connection available after {timeout:.1f}s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._lock.wait(remaining)
+        
+        if create:
+            try:
+                connection = self._create()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+        elif not self._is_alive(connection, time.monotonic() - last_used):
+            # Dead session: drop it and open a replacement in its slot
+            self._close_quietly(connection)
+            try:
+                connection = self._create()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                    self._lock.notify()
+                raise
+            with self._lock:
+                self._reconnects += 1
+        
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._recent_waits.append(waited)
+        return connection
+    
+    def release(self, connection, discard: bool = False):
+        """
+        Return a connection to the pool
+        
+        Args:
+            connection: Connection obtained from acquire()
+            discard: Close the connection instead of reusing it (e.g. after
+                a connection-level error)
+        """
+        if discard or self._closed or self._is_closed(connection):
+            self._close_quietly(connection)
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            return
+        
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+    
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Check out a connection for the duration of a with-block"""
+        connection = self.acquire(timeout)
+        discard = False
+        try:
+            yield connection
+        except Exception:
+            discard = self._is_closed(connection)
+            raise
+        finally:
+            self.release(connection, discard=discard)
+    
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        
+        for connection in idle:
+            self._close_quietly(connection)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage and checkout wait-time metrics"""
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            checkouts = self._checkouts
+            
+            def percentile(fraction: float) -> float:
+                if not waits:
+                    return 0.0
+                return waits[min(len(waits) - 1, int(fraction * len(waits)))]
+            
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "checkouts": checkouts,
+                "created": self._created,
+                "evicted": self._evicted,
+                "reconnects": self._reconnects,
+                "timeouts": self._timeouts,
+                "wait_avg_ms": round(1000 * self._total_wait / checkouts, 3) if checkouts else 0.0,
+                "wait_p50_ms": round(1000 * percentile(0.50), 3),
+                "wait_p95_ms": round(1000 * percentile(0.95), 3),
+                "wait_max_ms": round(1000 * self._max_wait, 3),
+            }
+    
+    def _create(self):
+        """Open a new connection (caller has already reserved its slot)"""
+        connection = self.connection_factory()
+        with self._lock:
+            self._created += 1
+        return connection
+    
+    def _evict_idle_locked(self):
+        """Close connections idle past idle_timeout, keeping min_size open"""
+        now = time.monotonic()
+        # Oldest idle connections sit at the left end of the deque
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            connection, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_quietly(connection)
+    
+    def _is_alive(self, connection, idle_seconds: float) -> bool:
+        """Check a connection before reuse; ping it if it sat idle a while"""
+        if self._is_closed(connection):
+            return False
+        if idle_seconds < self.liveness_check_after:
+            return True
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _is_closed(connection) -> bool:
+        try:
+            return connection.is_closed()
+        except Exception:
+            return True
+    
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class PooledSnowflakeClient(SnowflakeClient):
+    """
+    SnowflakeClient backed by a connection pool
+    
+    Each operation checks a connection out for its duration, so concurrent
+    tool calls run on separate sessions instead of serializing on one.
+    Nested calls on the same thread (e.g. import_health_records calling
+    create_or_get_patient) reuse the connection already checked out.
+    """
+    
+    def __init__(
+        self,
+        *args,
+        pool_min_size: int = 1,
+        pool_max_size: int = 4,
+        pool_idle_timeout: float = 600.0,
+        pool_liveness_check_after: float = 60.0,
+        pool_checkout_timeout: float = 30.0,
+        **kwargs,
+    ):
+        """
+        Initialize pooled client
+        
+        Accepts the same arguments as SnowflakeClient plus pool settings
+        (see SnowflakeConnectionPool for their meaning).
+        """
+        super().__init__(*args, **kwargs)
+        self.pool = SnowflakeConnectionPool(
+            connection_factory=self.open_connection,
+            min_size=pool_min_size,
+            max_size=pool_max_size,
+            idle_timeout=pool_idle_timeout,
+            liveness_check_after=pool_liveness_check_after,
+            checkout_timeout=pool_checkout_timeout,
+        )
+        self.max_concurrency = pool_max_size
+        self._local = threading.local()
+        self._pool_open = False
+    
+    def connect(self) -> bool:
+        """Open the pool's minimum connections"""
+        try:
+            self.pool.open()
+            self._pool_open = True
+            return True
+        except Exception as e:
+            print(f"ERROR: Failed to connect to Snowflake: {e}")
+            return False
+    
+    def disconnect(self):
+        """Close all pooled connections"""
+        self.pool.close()
+        self._pool_open = False
+    
+    def is_connected(self) -> bool:
+        """Check if the pool is accepting checkouts"""
+        return self._pool_open
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool metrics (see SnowflakeConnectionPool.stats)"""
+        return self.pool.stats()
+    
+    @contextmanager
+    def _checkout(self, shared: bool = True) -> Iterator[Any]:
+        held = getattr(self._local, "connection", None)
+        if held is not None:
+            yield held
+            return
+        
+        with self.pool.connection() as connection:
+            if not shared:
+                yield connection
+                return
+            self._local.connection = connection
+            try:
+                yield connection
+            finally:
+                self._local.connection = None
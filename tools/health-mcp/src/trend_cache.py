@@ -0,0 +1,192 @@
+"""
+Trend Cache
+Per-patient trend series kept up to date incrementally from a created_date watermark
+"""
+
+import bisect
+import math
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, List, Optional
+
+import trend_stats
+from ttl_cache import TTLCache
+
+
+class TrendSeries:
+    """
+    Date-ordered points of one trend window with running statistics
+    
+    Points are merged in as they are fetched and dropped from the front as
+    the window slides forward; count, sums for the standard deviation and
+    least-squares slope, minimum and maximum are updated per point rather
+    than recomputed over the series.
+    """
+    
+    def __init__(self):
+        self.dates: List[date] = []
+        self.values: List[float] = []
+        self.record_ids: List[int] = []
+        self.watermark: Optional[datetime] = None  # Latest created_date merged
+        self.lock = threading.Lock()
+        
+        self._known_ids = set()
+        self._origin: Optional[date] = None  # Day 0 for the slope sums
+        self._total = 0.0
+        self._squares = 0.0
+        self._day_total = 0.0
+        self._day_squares = 0.0
+        self._day_products = 0.0
+        self._minimum: Optional[float] = None
+        self._maximum: Optional[float] = None
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def merge(self, record_id: int, record_date: date, value: float, created_date: Optional[datetime]) -> bool:
+        """
+        Add one point, keeping the series date-ordered
+        
+        Returns:
+            False if the record was already in the series
+        """
+        if created_date is not None and (self.watermark is None or created_date > self.watermark):
+            self.watermark = created_date
+        if record_id in self._known_ids:
+            return False
+        
+        # New records are usually the latest, so this is normally an append
+        position = bisect.bisect_right(self.dates, record_date)
+        self.dates.insert(position, record_date)
+        self.values.insert(position, value)
+        self.record_ids.insert(position, record_id)
+        self._known_ids.add(record_id)
+        
+        self._accumulate(record_date, value, 1)
+        self._minimum = value if self._minimum is None else min(self._minimum, value)
+        self._maximum = value if self._maximum is None else max(self._maximum, value)
+        return True
+    
+    def evict_before(self, cutoff: date) -> int:
+        """Drop points dated before cutoff; returns the number dropped"""
+        dropped = bisect.bisect_left(self.dates, cutoff)
+        if not dropped:
+            return 0
+        
+        evicted = self.values[:dropped]
+        for record_id, record_date, value in zip(self.record_ids[:dropped], self.dates[:dropped], evicted):
+            self._known_ids.discard(record_id)
+            self._accumulate(record_date, value, -1)
+        del self.dates[:dropped], self.values[:dropped], self.record_ids[:dropped]
+        
+        # Only rescan when an extreme value left the window
+        if self._minimum in evicted or self._maximum in evicted:
+            self._minimum = min(self.values) if self.values else None
+            self._maximum = max(self.values) if self.values else None
+        return dropped
+    
+    def statistics(self) -> Dict[str, Any]:
+        """
+        Summary statistics with the same keys as trend_stats.summarize
+        
+        Quartiles and outliers need the whole series, so those are computed
+        over the cached values; the rest come from the running sums.
+        """
+        count = len(self.values)
+        if not count:
+            return {"count": 0, "trend": "stable"}
+        
+        average = self._total / count
+        stddev = 0.0
+        if count > 1:
+            stddev = math.sqrt(max(0.0, self._squares - self._total * average) / (count - 1))
+        
+        slope = None
+        spread = self._day_squares - self._day_total ** 2 / count
+        if count >= 2 and spread > 0:
+            slope = (self._day_products - self._day_total * self._total / count) / spread
+        span_days = (self.dates[-1] - self.dates[0]).days
+        
+        values = trend_stats.as_values(self.values)
+        quartiles = trend_stats.percentiles(values)
+        
+        return {
+            "count": count,
+            "average": round(average, 2),
+            "minimum": self._minimum,
+            "maximum": self._maximum,
+            "stddev": round(stddev, 2),
+            "p25": quartiles["p25"],
+            "median": quartiles["p50"],
+            "p75": quartiles["p75"],
+            "slope_per_day": slope,
+            "outliers": int(trend_stats.outlier_mask(values).sum()),
+            "trend": trend_stats.trend_direction(slope, span_days, average),
+        }
+    
+    def _accumulate(self, record_date: date, value: float, sign: int):
+        """Add (sign=1) or remove (sign=-1) a point from the running sums"""
+        if self._origin is None:
+            self._origin = record_date
+        day = float((record_date - self._origin).days)
+        self._total += sign * value
+        self._squares += sign * value * value
+        self._day_total += sign * day
+        self._day_squares += sign * day * day
+        self._day_products += sign * day * value
+
+
+class TrendCache:
+    """
+    Bounded cache of TrendSeries keyed by (patient_id, attribute, days)
+    
+    A series remembers the newest created_date it has seen. Refreshing it
+    only needs the records created since then, so re-opening a trend costs
+    about the same however long the history is.
+    
+    created_date is set when a row is written, not when its import commits,
+    so a long import can make rows visible behind the watermark. The
+    executor therefore drops a patient's series whenever an import for them
+    commits (see SnowflakeClient.add_invalidation_listener); the TTL covers
+    rows written by other processes.
+    """
+    
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 24 * 3600.0):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Maximum number of series kept
+            ttl: Seconds before a series is rebuilt from scratch (None = never)
+        """
+        self._series = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._create_lock = threading.Lock()
+    
+    @staticmethod
+    def key(patient_id: int, attribute: str, days: int) -> Hashable:
+        return (patient_id, attribute.strip().lower(), int(days))
+    
+    def series(self, patient_id: int, attribute: str, days: int) -> TrendSeries:
+        """Cached series for a trend window, created empty on first use"""
+        key = self.key(patient_id, attribute, days)
+        with self._create_lock:
+            series = self._series.get(key)
+            if series is None:
+                series = TrendSeries()
+                self._series.set(key, series)
+            return series
+    
+    def fetch_since(self, series: TrendSeries) -> Optional[datetime]:
+        """created_date lower bound for a refresh (None = load the whole window)"""
+        return series.watermark
+    
+    def invalidate_patient(self, patient_id: Optional[int] = None):
+        """Drop one patient's series (e.g. after an import or edit), or all when None"""
+        if patient_id is None:
+            self._series.invalidate()
+        else:
+            self._series.invalidate_matching(lambda key: key[0] == patient_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the series cache"""
+        return self._series.stats()
@@ -0,0 +1,215 @@
+"""
+Trend Statistics
+Vectorized (NumPy) statistics over health measurement series
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+
+# Fitted change over a series, relative to its average, above which a trend
+# counts as increasing / decreasing
+TREND_CHANGE_THRESHOLD = 0.05
+
+# Tukey fence multiplier for outlier_mask
+OUTLIER_IQR_FACTOR = 1.5
+
+# ewma rescales each block by decay**-k; blocks are sized so that factor
+# stays below 10**EWMA_MAX_EXPONENT and the float math cannot overflow
+EWMA_MAX_EXPONENT = 150
+
+
+def as_values(values) -> np.ndarray:
+    """Values as a float array"""
+    return np.asarray(values, dtype=float)
+
+
+def as_days(dates) -> np.ndarray:
+    """Dates (date objects, ISO strings or datetime64) as float days since the epoch"""
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64).astype(float)
+
+
+def slope_per_day(dates, values) -> Optional[float]:
+    """
+    Least-squares slope of values against date, in units per day
+    
+    Returns:
+        Slope, or None if there are fewer than two distinct dates
+    """
+    return _least_squares_slope(as_days(dates), as_values(values))
+
+
+def _least_squares_slope(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    if y.size < 2:
+        return None
+    
+    x = x - x.mean()  # Centering keeps the sums well conditioned
+    spread = float(np.dot(x, x))
+    if spread == 0.0:
+        return None
+    return float(np.dot(x, y - y.mean()) / spread)
+
+
+def trend_direction(slope: Optional[float], span_days: float, average: Optional[float]) -> str:
+    """Label a fitted slope: increasing, decreasing or stable (see TREND_CHANGE_THRESHOLD)"""
+    if slope is None or not average:
+        return "stable"
+    
+    relative_change = slope * span_days / abs(average)
+    if relative_change > TREND_CHANGE_THRESHOLD:
+        return "increasing"
+    if relative_change < -TREND_CHANGE_THRESHOLD:
+        return "decreasing"
+    return "stable"
+
+
+def rolling_mean(values, window: int) -> np.ndarray:
+    """
+    Trailing mean over the last `window` points
+    
+    The first window - 1 entries average over the points available so far.
+    """
+    if window < 1:
+        raise ValueError(f"window must be positive, got {window}")
+    
+    y = as_values(values)
+    sums = np.cumsum(y)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(1, y.size + 1), window)
+    return sums / counts
+
+
+def ewma(values, alpha: float) -> np.ndarray:
+    """
+    Exponentially weighted moving average, seeded with the first value
+    
+    Computes y[i] = alpha * x[i] + (1 - alpha) * y[i - 1] in vectorized
+    blocks instead of a Python loop over points.
+    """
+    if not 0.0 < alpha <= 1.0:
+        raise ValueError(f"alpha must be in (0, 1], got {alpha}")
+    
+    x = as_values(values)
+    if x.size == 0 or alpha == 1.0:
+        return x.copy()
+    
+    decay = 1.0 - alpha
+    block = max(1, int(EWMA_MAX_EXPONENT / -np.log10(decay)))
+    
+    smoothed = np.empty_like(x)
+    previous = x[0]
+    for start in range(0, x.size, block):
+        chunk = x[start:start + block]
+        steps = np.arange(chunk.size)
+        # y[k] = decay**(k+1) * previous + alpha * sum(decay**(k-j) * x[j] for j <= k)
+        weighted = np.cumsum(chunk * decay ** -steps)
+        smoothed[start:start + chunk.size] = decay ** steps * (decay * previous + alpha * weighted)
+        previous = smoothed[start + chunk.size - 1]
+    return smoothed
+
+
+def lttb(dates, values, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    
+    Keeps the first and last points and, from each of max_points - 2
+    equal-sized buckets in between, the point forming the largest triangle
+    with the previously kept point and the next bucket's average. Peaks
+    and dips survive, unlike with plain averaging or striding.
+    
+    Returns:
+        Sorted indexes of the points to keep
+    """
+    y = as_values(values)
+    count = y.size
+    if max_points >= count:
+        return np.arange(count)
+    if max_points < 3:
+        raise ValueError(f"max_points must be at least 3, got {max_points}")
+    
+    x = as_days(dates)
+    edges = np.linspace(1, count - 1, max_points - 1).astype(np.int64)
+    
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, count - 1
+    anchor = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The last bucket's neighbour is the final point
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        
+        # Twice the triangle area (anchor, candidate, next average)
+        areas = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor])
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def percentiles(values, quantiles: Sequence[float] = (25, 50, 75)) -> Dict[str, float]:
+    """Linear-interpolated percentiles keyed "p25", "p50", ..."""
+    y = as_values(values)
+    if y.size == 0:
+        return {}
+    
+    results = np.percentile(y, quantiles)
+    return {f"p{quantile:g}": float(result) for quantile, result in zip(quantiles, results)}
+
+
+def outlier_mask(values, factor: float = OUTLIER_IQR_FACTOR) -> np.ndarray:
+    """Boolean mask of values outside the Tukey fences (factor * IQR beyond the quartiles)"""
+    y = as_values(values)
+    if y.size < 4:
+        return np.zeros(y.size, dtype=bool)
+    
+    q1, q3 = np.percentile(y, [25, 75])
+    spread = factor * (q3 - q1)
+    return (y < q1 - spread) | (y > q3 + spread)
+
+
+def summarize(values, dates=None) -> Dict[str, Any]:
+    """
+    Summary statistics for a date-ordered series
+    
+    Args:
+        values: Numeric values
+        dates: Matching dates; enables the least-squares slope and trend
+            label (without them the trend is "stable")
+    
+    Returns:
+        Dictionary with count, average, minimum, maximum, stddev, quartiles,
+        slope_per_day, outlier count and trend
+    """
+    y = as_values(values)
+    count = int(y.size)
+    if count == 0:
+        return {"count": 0, "trend": "stable"}
+    
+    average = float(y.mean())
+    p25, median, p75 = (float(value) for value in np.percentile(y, [25, 50, 75]))
+    
+    slope = None
+    span_days = 0.0
+    if dates is not None:
+        days = as_days(dates)
+        slope = _least_squares_slope(days, y)
+        span_days = float(days.max() - days.min())
+    
+    return {
+        "count": count,
+        "average": round(average, 2),
+        "minimum": float(y.min()),
+        "maximum": float(y.max()),
+        "stddev": round(float(y.std(ddof=1)), 2) if count > 1 else 0.0,
+        "p25": p25,
+        "median": median,
+        "p75": p75,
+        "slope_per_day": slope,
+        "outliers": int(outlier_mask(y).sum()),
+        "trend": trend_direction(slope, span_days, average),
+    }
@@ -0,0 +1,109 @@
+"""
+TTL Cache
+Thread-safe, size-bounded LRU cache with per-entry expiry and hit/miss counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU cache whose entries expire after ttl seconds
+    
+    Safe to share between threads. Expired entries are dropped lazily when
+    looked up; once maxsize is reached the least recently used entry is
+    evicted to make room.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Maximum number of entries kept
+            ttl: Seconds an entry stays valid (None = no expiry)
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        
+        self.maxsize = maxsize
+        self.ttl = ttl
+        
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entry if full"""
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._invalidations += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(key, None) is not None:
+                self._invalidations += 1
+    
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key satisfies predicate; returns the count dropped"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            self._invalidations += len(keys)
+            return len(keys)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
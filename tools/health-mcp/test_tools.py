@@ -6,6 +6,8 @@ Tests import and query functionality against Snowflake
 
 import sys
 import json
+import time
+import contextlib
 from datetime import date, timedelta
 from pathlib import Path
 
@@ -20,6 +22,7 @@ from health_models import (
     MedicationRecord,
 )
 from snowflake_client import SnowflakeClient
+from snowflake_pool import PooledSnowflakeClient, PoolTimeoutError, SnowflakeConnectionPool
 
 
 # Test configuration
@@ -141,6 +144,7 @@ def test_import_health_records():
             print(f"  Records inserted: {result['records_inserted']}")
             print(f"  Records failed:   {result['records_failed']}")
             print(f"  Types: {result['record_types']}")
+            print(f"  Records/sec:     {result['records_per_second']}")
         else:
             print(f"⚠ Import completed with issues")
             print(f"  Records inserted: {result['records_inserted']}")
@@ -220,6 +224,84 @@ def test_query_health_records():
         return False
 
 
+def test_connection_pool():
+    """Test concurrent queries over the pooled client"""
+    print("\n" + "=" * 70)
+    print("TEST 5: Connection Pool")
+    print("=" * 70)
+    
+    try:
+        from concurrent.futures import ThreadPoolExecutor
+        
+        client = PooledSnowflakeClient(**SNOWFLAKE_CONFIG, pool_min_size=1, pool_max_size=3)
+        
+        if not client.connect():
+            print("❌ FAILED: Could not connect to Snowflake")
+            return False
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            patient_ids = list(executor.map(lambda _: client.get_patient_id(TEST_PATIENT), range(12)))
+        
+        stats = client.pool_stats()
+        print(f"✓ Ran {len(patient_ids)} concurrent lookups")
+        print(f"  Connections opened: {stats['created']} (max {stats['max_size']})")
+        print(f"  Wait avg/p95/max:   {stats['wait_avg_ms']} / {stats['wait_p95_ms']} / {stats['wait_max_ms']} ms")
+        
+        client.disconnect()
+        return len(set(patient_ids)) == 1 and stats["created"] <= stats["max_size"]
+        
+    except Exception as e:
+        print(f"❌ FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_batch_import():
+    """Test parallel multi-patient import"""
+    print("\n" + "=" * 70)
+    print("TEST 6: Parallel Batch Import")
+    print("=" * 70)
+    
+    try:
+        client = PooledSnowflakeClient(**SNOWFLAKE_CONFIG, pool_min_size=1, pool_max_size=3)
+        
+        if not client.connect():
+            print("❌ FAILED: Could not connect to Snowflake")
+            return False
+        
+        today = date.today()
+        patients = [f"{TEST_PATIENT}_batch_{i}" for i in range(3)]
+        records = [
+            HealthRecord(
+                record_class=RecordClass.VITAL,
+                record_date=today - timedelta(days=day),
+                patient_identity=patient,
+                data={"vital_type": "HR", "value": f"{60 + day} bpm"},
+                extraction_confidence=0.9,
+            )
+            for patient in patients
+            for day in range(5)
+        ]
+        
+        result = client.import_health_records_batch(records, import_source="test_batch_import", parallelism=3)
+        
+        print(f"✓ Imported {result['records_inserted']} records for {result['patient_count']} patients")
+        print(f"  Parallelism:     {result['parallelism']}")
+        print(f"  Records/sec:     {result['records_per_second']}")
+        for identity, summary in result["patients"].items():
+            print(f"  - {identity}: import {summary.get('import_id')}, {summary['records_inserted']} inserted")
+        
+        client.disconnect()
+        return result["success"] and result["records_inserted"] == len(records)
+        
+    except Exception as e:
+        print(f"❌ FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def test_model_validation():
     """Test Pydantic model validation"""
     print("\n" + "=" * 70)
@@ -261,6 +343,163 @@ def test_model_validation():
         return False
 
 
+def test_connection_pool_lifecycle():
+    """Test pool timeouts, liveness replacement and idle eviction (offline, fake connections)"""
+    print("\n" + "=" * 70)
+    print("TEST 7: Connection Pool Lifecycle")
+    print("=" * 70)
+    
+    class FakeConnection:
+        """Stands in for a Snowflake connection; a dead one fails SELECT 1"""
+        
+        def __init__(self):
+            self.dead = False
+            self.closed = False
+        
+        def cursor(self):
+            return self
+        
+        def execute(self, query):
+            if self.dead:
+                raise RuntimeError("Session no longer exists")
+        
+        def fetchall(self):
+            return [(1,)]
+        
+        def is_closed(self):
+            return self.closed
+        
+        def close(self):
+            self.closed = True
+    
+    checks = []
+    
+    try:
+        # Checkout times out when every connection is in use
+        pool = SnowflakeConnectionPool(FakeConnection, min_size=0, max_size=1, checkout_timeout=0.05)
+        held = pool.acquire()
+        try:
+            pool.acquire()
+            checks.append(("acquire timeout raises", False))
+        except PoolTimeoutError:
+            checks.append(("acquire timeout raises", pool.stats()["timeouts"] == 1))
+        pool.release(held)
+        checks.append(("released connection is reused", pool.acquire() is held))
+        
+        # A connection that died while idle is replaced on checkout
+        pool = SnowflakeConnectionPool(FakeConnection, min_size=0, max_size=1, liveness_check_after=0.0)
+        first = pool.acquire()
+        pool.release(first)
+        first.dead = True
+        second = pool.acquire()
+        checks.append(("dead connection replaced", second is not first and first.closed))
+        checks.append(("replacement counted", pool.stats()["reconnects"] == 1))
+        
+        # Connections idle past idle_timeout are closed down to min_size
+        pool = SnowflakeConnectionPool(FakeConnection, min_size=1, max_size=3, idle_timeout=0.01)
+        connections = [pool.acquire() for _ in range(3)]
+        for connection in connections:
+            pool.release(connection)
+        time.sleep(0.05)
+        pool.acquire()
+        stats = pool.stats()
+        checks.append(("idle connections evicted", stats["evicted"] == 2 and stats["open"] == 1))
+        checks.append(("evicted connections closed", sum(c.closed for c in connections) == 2))
+        
+    except Exception as e:
+        print(f"❌ FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    
+    for name, passed in checks:
+        print(f"{'✓' if passed else '❌'} {name}")
+    return all(passed for _, passed in checks)
+
+
+def test_batch_import_partitioning():
+    """Test batch import grouping and failure isolation (offline, fake client)"""
+    print("\n" + "=" * 70)
+    print("TEST 8: Batch Import Partitioning")
+    print("=" * 70)
+    
+    class FakeImportClient(SnowflakeClient):
+        """Records each patient's partition; importing the failing patient raises"""
+        
+        max_concurrency = 3
+        
+        def __init__(self, failing_identity):
+            super().__init__("account", "user", "password", "warehouse")
+            self.failing_identity = failing_identity
+            self.partitions = {}
+        
+        def is_connected(self):
+            return True
+        
+        def _checkout(self, shared=True):
+            return contextlib.nullcontext(object())
+        
+        def create_or_get_patients(self, patient_identities):
+            return {identity: index for index, identity in enumerate(sorted(patient_identities), 1)}
+        
+        def create_or_get_patient(self, patient_identity):
+            return self.create_or_get_patients([patient_identity])[patient_identity]
+        
+        def _import_patient_records(self, conn, patient_identity, patient_id, records, import_stats, batch_size):
+            self.partitions[patient_identity] = list(records)
+            if patient_identity == self.failing_identity:
+                raise RuntimeError("warehouse suspended")
+            return {
+                "patient_identity": patient_identity,
+                "patient_id": patient_id,
+                "records_inserted": len(records),
+                "records_failed": 0,
+                "record_types": {RecordClass.VITAL.value: len(records)},
+            }
+    
+    patients = [f"{TEST_PATIENT}_batch_{i}" for i in range(3)]
+    # Interleave patients so grouping has to regroup rather than split runs
+    records = [
+        HealthRecord(
+            record_class=RecordClass.VITAL,
+            record_date=date.today() - timedelta(days=day),
+            patient_identity=patient,
+            data={"vital_type": "HR", "value": f"{60 + day} bpm"},
+        )
+        for day in range(4)
+        for patient in patients
+    ]
+    
+    try:
+        client = FakeImportClient(failing_identity=patients[1])
+        result = client.import_health_records_batch(records, parallelism=3)
+        
+        # The single-patient entry point files everything under its argument
+        single = FakeImportClient(failing_identity=None)
+        single_result = single.import_health_records(TEST_PATIENT, records)
+    except Exception as e:
+        print(f"❌ FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    
+    expected = {patient: [r for r in records if r.patient_identity == patient] for patient in patients}
+    checks = [
+        ("one partition per patient", client.partitions == expected),
+        ("failed patient reported", result["failed_patients"] == [patients[1]]),
+        ("other patients still imported", result["records_inserted"] == 8),
+        ("failed patient's records counted", result["records_failed"] == 4),
+        ("failed patient keeps its summary", "warehouse suspended" in result["patients"][patients[1]]["error"]),
+        ("batch not reported as success", result["success"] is False),
+        ("explicit identity wins", list(single.partitions) == [TEST_PATIENT]),
+        ("explicit identity gets every record", single_result["records_inserted"] == len(records)),
+    ]
+    
+    for name, passed in checks:
+        print(f"{'✓' if passed else '❌'} {name}")
+    return all(passed for _, passed in checks)
+
+
 def main():
     """Run all tests"""
     print("\n" + "=" * 70)
@@ -272,6 +511,10 @@ def main():
         ("Model Validation", test_model_validation),
         ("Import Records", test_import_health_records),
         ("Query Records", test_query_health_records),
+        ("Connection Pool", test_connection_pool),
+        ("Batch Import", test_batch_import),
+        ("Pool Lifecycle", test_connection_pool_lifecycle),
+        ("Batch Partitioning", test_batch_import_partitioning),
     ]
     
     results = {}
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test Trend Statistics
+Checks the vectorized trend_stats functions against plain-Python references
+(runs offline, no Snowflake connection needed)
+"""
+
+import math
+import statistics
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import trend_stats
+
+
+def close(actual, expected, tolerance: float = 1e-9) -> bool:
+    """Float comparison relative to the expected magnitude"""
+    return math.isclose(actual, expected, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def sample_series(points: int = 60):
+    """Irregularly spaced daily readings with a drift, a cycle and one spike"""
+    start = date(2026, 1, 1)
+    dates = [start + timedelta(days=day + day // 7) for day in range(points)]
+    values = [100.0 + 0.4 * day + 6.0 * math.sin(day / 3.0) for day in range(points)]
+    values[points // 2] += 80.0
+    return dates, values
+
+
+def test_slope_per_day():
+    """Test least-squares slope against the textbook formula"""
+    print("\n" + "=" * 70)
+    print("TEST 1: Least-Squares Slope")
+    print("=" * 70)
+    
+    dates, values = sample_series()
+    
+    days = [d.toordinal() for d in dates]
+    mean_day = sum(days) / len(days)
+    mean_value = sum(values) / len(values)
+    expected = sum((x - mean_day) * (y - mean_value) for x, y in zip(days, values)) / sum(
+        (x - mean_day) ** 2 for x in days
+    )
+    
+    checks = [
+        ("matches reference", close(trend_stats.slope_per_day(dates, values), expected)),
+        ("ISO strings accepted", close(trend_stats.slope_per_day([str(d) for d in dates], values), expected)),
+        ("single point has no slope", trend_stats.slope_per_day(dates[:1], values[:1]) is None),
+        ("one distinct date has no slope", trend_stats.slope_per_day([dates[0]] * 3, [1.0, 2.0, 3.0]) is None),
+    ]
+    
+    for name, passed in checks:
+        print(f"{'✓' if passed else '❌'} {name}")
+    return all(passed for _, passed in checks)
+
+
+def test_ewma():
+    """Test blocked EWMA against the recursive definition"""
+    print("\n" + "=" * 70)
+    print("TEST 2: Exponentially Weighted Moving Average")
+    print("=" * 70)
+    
+    _, values = sample_series(2000)
+    
+    all_passed = True
+    # alpha=0.5 runs several vectorized blocks over 2000 points
+    for alpha in [0.05, 0.3, 0.5, 1.0]:
+        expected = [values[0]]
+        for value in values[1:]:
+            expected.append(alpha * value + (1 - alpha) * expected[-1])
+        
+        actual = trend_stats.ewma(values, alpha)
+        passed = len(actual) == len(expected) and all(close(a, e, 1e-9) for a, e in zip(actual, expected))
+        print(f"{'✓' if passed else '❌'} alpha={alpha}")
+        all_passed = all_passed and passed
+    
+    try:
+        trend_stats.ewma(values, 0.0)
+        print("❌ alpha=0 should be rejected")
+        all_passed = False
+    except ValueError:
+        print("✓ alpha=0 rejected")
+    
+    return all_passed
+
+
+def test_outlier_mask():
+    """Test Tukey fences against statistics.quantiles"""
+    print("\n" + "=" * 70)
+    print("TEST 3: Outlier Mask")
+    print("=" * 70)
+    
+    _, values = sample_series()
+    
+    q1, _, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    spread = trend_stats.OUTLIER_IQR_FACTOR * (q3 - q1)
+    expected = [value < q1 - spread or value > q3 + spread for value in values]
+    
+    actual = [bool(flag) for flag in trend_stats.outlier_mask(values)]
+    checks = [
+        ("matches reference", actual == expected),
+        ("spike flagged", actual[len(values) // 2]),
+        ("fewer than 4 values never flagged", not any(trend_stats.outlier_mask([1.0, 2.0, 100.0]))),
+    ]
+    
+    for name, passed in checks:
+        print(f"{'✓' if passed else '❌'} {name}")
+    return all(passed for _, passed in checks)
+
+
+def reference_lttb(xs, ys, threshold: int):
+    """Plain-Python Largest-Triangle-Three-Buckets (Steinarsson's reference loop)"""
+    count = len(ys)
+    if threshold >= count:
+        return list(range(count))
+    
+    every = (count - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        next_start = int(math.floor((bucket + 1) * every)) + 1
+        next_end = min(int(math.floor((bucket + 2) * every)) + 1, count)
+        next_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+        
+        best_area, best = -1.0, None
+        for index in range(int(math.floor(bucket * every)) + 1, next_start):
+            area = abs(
+                (xs[anchor] - next_x) * (ys[index] - ys[anchor])
+                - (xs[anchor] - xs[index]) * (next_y - ys[anchor])
+            )
+            if area > best_area:
+                best_area, best = area, index
+        selected.append(best)
+        anchor = best
+    selected.append(count - 1)
+    return selected
+
+
+def test_lttb():
+    """Test LTTB downsampling against the reference loop"""
+    print("\n" + "=" * 70)
+    print("TEST 4: LTTB Downsampling")
+    print("=" * 70)
+    
+    dates, values = sample_series(500)
+    days = [d.toordinal() for d in dates]
+    
+    all_passed = True
+    for max_points in [3, 4, 17, 100, 499]:
+        actual = [int(index) for index in trend_stats.lttb(dates, values, max_points)]
+        expected = reference_lttb(days, values, max_points)
+        passed = (
+            actual == expected
+            and actual[0] == 0
+            and actual[-1] == len(values) - 1
+            and len(actual) == max_points
+        )
+        print(f"{'✓' if passed else '❌'} max_points={max_points}: {len(actual)} points, endpoints kept")
+        all_passed = all_passed and passed
+    
+    spike = len(values) // 2
+    kept_spike = spike in [int(index) for index in trend_stats.lttb(dates, values, 20)]
+    print(f"{'✓' if kept_spike else '❌'} spike survives downsampling to 20 points")
+    
+    keeps_all = list(trend_stats.lttb(dates, values, len(values))) == list(range(len(values)))
+    print(f"{'✓' if keeps_all else '❌'} max_points >= points keeps every point")
+    
+    try:
+        trend_stats.lttb(dates, values, 2)
+        print("❌ max_points=2 should be rejected")
+        rejects_two = False
+    except ValueError:
+        print("✓ max_points=2 rejected")
+        rejects_two = True
+    
+    return all_passed and kept_spike and keeps_all and rejects_two
+
+
+def main():
+    """Run all tests"""
+    print("\n" + "=" * 70)
+    print("TREND STATISTICS TEST SUITE")
+    print("=" * 70)
+    
+    tests = [
+        ("Slope", test_slope_per_day),
+        ("EWMA", test_ewma),
+        ("Outliers", test_outlier_mask),
+        ("LTTB", test_lttb),
+    ]
+    
+    results = {}
+    
+    for test_name, test_func in tests:
+        try:
+            results[test_name] = test_func()
+        except Exception as e:
+            print(f"\n❌ Test {test_name} crashed: {e}")
+            import traceback
+            traceback.print_exc()
+            results[test_name] = False
+    
+    # Summary
+    print("\n" + "=" * 70)
+    print("TEST SUMMARY")
+    print("=" * 70)
+    
+    passed = sum(1 for v in results.values() if v)
+    total = len(results)
+    
+    for test_name, passed_flag in results.items():
+        status = "✓ PASS" if passed_flag else "❌ FAIL"
+        print(f"{status}  {test_name}")
+    
+    print(f"\nTotal: {passed}/{total} test suites passed")
+    
+    return 0 if passed == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())